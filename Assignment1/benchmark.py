@@ -0,0 +1,170 @@
+"""
+Benchmarks of the sampling and estimation hot paths of Assignment 1.
+
+Every benchmark is timed over a matrix of sample sizes and maximum iterations,
+and reports the throughput in points/s and iterations/s and the peak memory.
+The iterations are the escape counts of the sampled points summed, which is the
+work of the brute-force iteration. Every variant of a benchmark is credited with
+the same iterations, also when it skips points with the shortcuts, so iters/s
+compares the variants on the same work. A timed run calls a benchmark as often
+as it takes to last at least 0.2 s, and the seconds are per call, so the short
+benchmarks are not dominated by timer noise. Save a baseline on a machine with
+
+    python benchmark.py --save
+
+and compare later runs against it with
+
+    python benchmark.py --threshold 0.25
+
+which exits with 1 when a benchmark is slower, or uses more memory, than the
+baseline by more than the threshold.
+"""
+import argparse
+import json
+import os
+import sys
+import timeit
+import tracemalloc
+
+import numpy as np
+
+from mandelbrot import MandelBrot
+from montecarlo import monte_carlo
+
+SAMPLE_SIZES = [1000, 10000, 100000]
+ITERATIONS = [100, 1000]
+
+# The scalar _iterate is too slow for the larger sizes
+SCALAR_SAMPLE_SIZES = [1000]
+
+
+def scalar_iterate(mandelbrot, samples, max_iterations):
+    """
+    Iterates all samples one by one with MandelBrot._iterate.
+    """
+    return np.array([mandelbrot._iterate(complex(x, y), max_iterations) for x, y in zip(*samples)])
+
+def create_benchmarks(quick=False):
+    """
+    Creates the matrix of benchmarks.
+
+    args:
+        quick:      (Bool)  Only use the smallest sample size and iterations
+
+    returns:
+        benchmarks: (List)  (name, function, N, max_iterations, iterations) per benchmark,
+                            with iterations the escape counts of the samples summed, or
+                            None for the sampling benchmarks
+    """
+    sample_sizes = SAMPLE_SIZES[:1] if quick else SAMPLE_SIZES
+    iterations = ITERATIONS[:1] if quick else ITERATIONS
+
+    mandelbrot = MandelBrot(MaxSampleSize=max(sample_sizes), seed=0)
+    benchmarks = []
+
+    for N in sample_sizes:
+        benchmarks.append(('RANDOM_SAMPLE', lambda N=N: mandelbrot.RANDOM_SAMPLE(N), N, None, None))
+        benchmarks.append(('LHC_SAMPLE', lambda N=N: mandelbrot.LHC_SAMPLE(N), N, None, None))
+        benchmarks.append(('ORTHOGONAL_SAMPLE', lambda N=N: mandelbrot.ORTHOGONAL_SAMPLE(N), N, None, None))
+
+        samples = mandelbrot.RANDOM_SAMPLE(N)
+        for max_iterations in iterations:
+            work = int(mandelbrot._iterate_batch(*samples, max_iterations, shortcuts=False).sum())
+            if N in SCALAR_SAMPLE_SIZES:
+                benchmarks.append(('_iterate', lambda s=samples, i=max_iterations:
+                                   scalar_iterate(mandelbrot, s, i), N, max_iterations, work))
+            benchmarks.append(('_iterate_batch', lambda s=samples, i=max_iterations:
+                               mandelbrot._iterate_batch(*s, i), N, max_iterations, work))
+            benchmarks.append(('_iterate_batch_brute', lambda s=samples, i=max_iterations:
+                               mandelbrot._iterate_batch(*s, i, shortcuts=False), N, max_iterations, work))
+            benchmarks.append(('monte_carlo', lambda s=samples, i=max_iterations:
+                               monte_carlo(s, i, mandelbrot), N, max_iterations, work))
+
+    return [(f'{name}[N={N}]' if max_iterations is None else f'{name}[N={N},iterations={max_iterations}]',
+             function, N, max_iterations, work) for name, function, N, max_iterations, work in benchmarks]
+
+def run_benchmark(function, repeats):
+    """
+    Times a benchmark and measures its peak memory.
+
+    args:
+        function:   (Function)  The benchmark
+        repeats:    (Int)       Amount of timed runs of at least 0.2 s, the fastest is kept
+
+    returns:
+        result:     (Dict)      Seconds per call and peak memory in bytes
+    """
+    timer = timeit.Timer(function)
+    number = timer.autorange()[0]
+    seconds = min(timer.repeat(repeat=repeats, number=number)) / number
+
+    # Memory is measured in a separate run, tracing slows the function down
+    tracemalloc.start()
+    function()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {'seconds': seconds, 'peak_memory': peak}
+
+def compare(results, baseline, threshold):
+    """
+    Compares the results with the baseline.
+
+    args:
+        results:        (Dict)  Result per benchmark
+        baseline:       (Dict)  Result per benchmark of the baseline
+        threshold:      (Float) Allowed relative regression
+
+    returns:
+        regressions:    (List)  Messages of the benchmarks that regressed more than the threshold
+    """
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        for key in ('seconds', 'peak_memory'):
+            if result[key] > baseline[name][key] * (1 + threshold):
+                regressions.append(f'{name}: {key} {result[key]:.4g} > baseline {baseline[name][key]:.4g}')
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmarks of the Assignment 1 hot paths')
+    parser.add_argument('--baseline', default='benchmark_baseline.json', help='file of the stored baseline')
+    parser.add_argument('--save', action='store_true', help='store the results as the new baseline')
+    parser.add_argument('--threshold', type=float, default=0.25, help='allowed relative regression')
+    parser.add_argument('--repeats', type=int, default=3, help='timed runs per benchmark')
+    parser.add_argument('--quick', action='store_true', help='only the smallest sizes')
+    args = parser.parse_args()
+
+    results = {}
+    print(f'{"benchmark":<50}{"seconds":>10}{"points/s":>12}{"iters/s":>12}{"peak MB":>10}')
+    for name, function, N, max_iterations, iterations in create_benchmarks(args.quick):
+        result = run_benchmark(function, args.repeats)
+        result['iterations'] = iterations
+        result['points_per_second'] = N / result['seconds']
+        result['iterations_per_second'] = iterations / result['seconds'] if iterations is not None else None
+        results[name] = result
+
+        iterations_per_second = result['iterations_per_second'] or float('nan')
+        print(f'{name:<50}{result["seconds"]:>10.4f}{result["points_per_second"]:>12.3g}'
+              f'{iterations_per_second:>12.3g}{result["peak_memory"] / 2**20:>10.2f}')
+
+    if args.save:
+        with open(args.baseline, 'w') as outfile:
+            json.dump(results, outfile, indent=2)
+        print(f'Baseline saved in {args.baseline}')
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f'No baseline in {args.baseline}, run with --save first')
+        return 0
+
+    with open(args.baseline) as infile:
+        regressions = compare(results, json.load(infile), args.threshold)
+    for regression in regressions:
+        print('REGRESSION', regression)
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
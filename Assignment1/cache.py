@@ -0,0 +1,211 @@
+import numpy as np
+import os
+import uuid
+from collections import OrderedDict
+
+
+class EscapeCache():
+
+    """
+    Class which caches the escape iterations of grid points, so baselines, boxplots
+    and sweeps on the same grid do not iterate the same points again. A bounded
+    LRU in memory sits in front of a memory-mapped store on disk, with one store
+    per grid resolution.
+
+    A point is stored as a single value: E > 0 when it escaped after E iterations,
+    which is its count for every budget, and -B when it did not escape within a
+    budget of B, which answers every budget up to B. Zero means unknown.
+    """
+
+    def __init__(self, directory='escape_cache', max_memory=2**20):
+        """
+        Initilization of the class.
+
+        args:
+            directory:  (String) Directory of the stores on disk, None to only cache in memory
+            max_memory: (Int)    Maximum amount of points in the in-memory LRU
+
+        returns:
+            EscapeCache (Class)
+        """
+        self.directory = directory
+        self.max_memory = max_memory
+        self.memory = OrderedDict()
+        self.stores = {}
+        self.hits, self.disk_hits, self.misses = 0, 0, 0
+
+    def __getstate__(self):
+        """
+        Worker processes reopen the stores themselves, so the memory-mapped
+        stores and the LRU are not pickled.
+        """
+        state = self.__dict__.copy()
+        state['memory'], state['stores'] = OrderedDict(), {}
+        return state
+
+    def _store(self, mandelbrot):
+        """
+        Method to open the store on disk for the resolution of the grid.
+
+        args:
+            mandelbrot: (Class)  Mandelbrot set as created in the MandelBrot Class
+
+        returns:
+            store:      (Memmap) Stored values of the grid, None without directory
+        """
+        key = (mandelbrot.grid_size, mandelbrot.X, mandelbrot.Y)
+        if self.directory is None:
+            return None
+
+        if key not in self.stores:
+            os.makedirs(self.directory, exist_ok=True)
+            path = os.path.join(self.directory, 'escape_{}x{}_{}_{}_{}_{}.npy'.format(*key[0], *key[1], *key[2]))
+
+            # Worker processes may create the same store at once, so a complete store
+            # is linked into place, which fails when another process was first
+            if not os.path.exists(path):
+                temporary = os.path.join(self.directory, f'.{uuid.uuid4().hex}.npy')
+                np.lib.format.open_memmap(temporary, mode='w+', dtype=np.int32, shape=key[0]).flush()
+                try:
+                    os.link(temporary, path)
+                except FileExistsError:
+                    pass
+                finally:
+                    os.remove(temporary)
+
+            self.stores[key] = np.lib.format.open_memmap(path, mode='r+')
+
+        return self.stores[key]
+
+    def _grid_index(self, mandelbrot, xs, ys):
+        """
+        Method to find the grid indices of the samples, samples which are not grid
+        values cannot be cached.
+
+        returns:
+            index:      (1D array) Flat index of every sample in the grid
+            on_grid:    (1D array) Boolean mask of the samples which are grid values
+        """
+        # Same step as np.arange uses for X_grid and Y_grid
+        x_step = (mandelbrot.X[0] + mandelbrot.sharpness) - mandelbrot.X[0]
+        y_step = (mandelbrot.Y[0] + mandelbrot.sharpness) - mandelbrot.Y[0]
+        ix = np.rint((xs - mandelbrot.X[0]) / x_step).astype(np.int64)
+        iy = np.rint((ys - mandelbrot.Y[0]) / y_step).astype(np.int64)
+
+        on_grid = ((ix >= 0) & (ix < mandelbrot.grid_size[0]) & (iy >= 0) & (iy < mandelbrot.grid_size[1]))
+        on_grid &= (mandelbrot.X[0] + ix * x_step == xs) & (mandelbrot.Y[0] + iy * y_step == ys)
+        return np.where(on_grid, ix * mandelbrot.grid_size[1] + iy, -1), on_grid
+
+    def iterate(self, mandelbrot, xs, ys, max_iterations, shortcuts=True):
+        """
+        Method which gives the same iterations as MandelBrot._iterate_batch, only
+        iterating the points which are not in the cache yet.
+
+        args:
+            mandelbrot:     (Class)    Mandelbrot set as created in the MandelBrot Class
+            xs:             (1D array) Real parts of the complex numbers
+            ys:             (1D array) Imaginary parts of the complex numbers
+            max_iterations: (Int)      Max iterations to check for convergence
+            shortcuts:      (Bool)     Use the interior check and cycle detection for the misses
+
+        returns:
+            iterations:     (1D array) Amount of iterations done for divergence, per point
+        """
+        xs, ys = np.asarray(xs, dtype=float).ravel(), np.asarray(ys, dtype=float).ravel()
+        index, on_grid = self._grid_index(mandelbrot, xs, ys)
+        values = np.zeros(len(xs), dtype=np.int64)
+
+        # In-memory LRU first
+        for i in np.flatnonzero(on_grid):
+            value = self.memory.get(index[i])
+            if value is not None:
+                self.memory.move_to_end(index[i])
+                values[i] = value
+        self.hits += np.count_nonzero(_answers(values, max_iterations))
+
+        # Then the store on disk
+        store = self._store(mandelbrot)
+        if store is not None:
+            from_disk = on_grid & ~_answers(values, max_iterations)
+            values[from_disk] = store.reshape(-1)[index[from_disk]]
+            on_disk = from_disk & _answers(values, max_iterations)
+            self.disk_hits += np.count_nonzero(on_disk)
+            self._remember(index[on_disk], values[on_disk])
+
+        # Iterate the misses and remember them
+        missed = ~_answers(values, max_iterations)
+        self.misses += np.count_nonzero(missed)
+        iterations = np.where(values > 0, np.minimum(values, max_iterations), max_iterations)
+        iterations[missed] = mandelbrot._iterate_batch(xs[missed], ys[missed], max_iterations, shortcuts=shortcuts)
+
+        new = missed & on_grid
+        new_values = np.where(iterations[new] < max_iterations, iterations[new], -max_iterations)
+        if store is not None:
+            store.reshape(-1)[index[new]] = new_values
+        self._remember(index[new], new_values)
+
+        return iterations
+
+    def _remember(self, index, values):
+        """
+        Method to put values in the in-memory LRU, dropping the least recently used.
+        """
+        for key, value in zip(index.tolist(), values.tolist()):
+            self.memory[key] = value
+            self.memory.move_to_end(key)
+        while len(self.memory) > self.max_memory:
+            self.memory.popitem(last=False)
+
+    def counts(self):
+        """
+        Method to give the counters of the cache, to add them to another cache.
+
+        returns:
+            counts:     (Tuple) Hits in memory, hits on disk and misses
+        """
+        return (self.hits, self.disk_hits, self.misses)
+
+    def add_counts(self, counts):
+        """
+        Method to add the counters of another cache, for example of a worker process.
+
+        args:
+            counts:     (Tuple) Hits in memory, hits on disk and misses
+        """
+        self.hits += counts[0]
+        self.disk_hits += counts[1]
+        self.misses += counts[2]
+
+    def hit_rate(self):
+        """
+        Method to give the fraction of the points which did not have to be iterated.
+
+        returns:
+            hit_rate:   (Float) Fraction of cache hits, in memory or on disk
+        """
+        total = self.hits + self.disk_hits + self.misses
+        return (self.hits + self.disk_hits) / total if total else 0.0
+
+    def report(self):
+        """
+        Method to give the hit rates of the cache.
+
+        returns:
+            report:     (Dict)  Hits in memory, hits on disk, misses and the hit rate
+        """
+        return {'MemoryHits': int(self.hits), 'DiskHits': int(self.disk_hits),
+                'Misses': int(self.misses), 'HitRate': float(self.hit_rate())}
+
+    def flush(self):
+        """
+        Method to write the stores on disk.
+        """
+        for store in self.stores.values():
+            store.flush()
+
+
+def _answers(values, max_iterations):
+    """
+    Whether the stored values give the iterations for a budget of max_iterations.
+    """
+    return (values > 0) | (-values >= max_iterations)
@@ -0,0 +1,519 @@
+import numpy as np
+import os
+from scipy.stats import qmc
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+
+class MandelBrot():
+
+    """
+    Class which helps creating a standard grid on which a mandelbrot can be
+    sampled. It consists of methods for creating a full mandelbrot, which has
+    the sole purpose of drawing images, and multiple sampling methods for the
+    grid.
+    """
+
+    def __init__(self, create_full=False, load=False, max_iterations=100, X=(-2, 1), Y=(-1.5, 1.5), MaxSampleSize=1024, seed=None, continuous=False, snap=False, cache=None):
+
+        """
+        Initilization of the class.
+
+        args:
+            create_full:    (Bool)  Set to true if image has to be drawn
+            load:           (Bool)  Set to true if mandelbrotdata has to be read from memory
+            max_iterations: (Int)   Maximum iterations for the full mandelbrot
+            X:              (Tuple) Min and max of the grid
+            Y:              (Tuple) Min and max of the grid
+            MaxSampleSize:  (Int)   Decisive for the amount of grid blocks on the X and Y axis
+            seed:           (Int)   Seed for the random number generator of the sampling methods
+            continuous:     (Bool)  Sample straight from the box X * Y, without creating the grid
+            snap:           (Bool)  Snap continuous samples to the grid values, without creating the grid
+            cache:          (Class) EscapeCache which monte_carlo consults for grid points
+
+        returns:
+            MandelbrotSet   (Class)
+        """
+
+        self.X, self.Y = X, Y
+        self.sharpness = (X[1] - X[0])/ MaxSampleSize
+        self.max_iterations = max_iterations
+        self.area_size = (X[1] - X[0]) * (Y[1] - Y[0])
+        self.rng = np.random.default_rng(seed)
+        self.continuous, self.snap = continuous, snap
+        self.cache = cache
+
+        # Amount of grid values, equal to the lengths of the grids
+        self.grid_size = (int(np.ceil((X[1] - X[0]) / self.sharpness)),
+                          int(np.ceil((Y[1] - Y[0]) / self.sharpness)))
+
+        if continuous:
+            if create_full or load:
+                raise ValueError('A full mandelbrot needs the grid, use continuous=False')
+            self.X_grid, self.Y_grid = None, None
+            self.MaxSampleSize = np.inf
+        else:
+            self.X_grid = np.arange(X[0], X[1], self.sharpness)
+            self.Y_grid = np.arange(Y[0], Y[1], self.sharpness)
+            self.grid_size = (len(self.X_grid), len(self.Y_grid))
+            self.MaxSampleSize = len(self.X_grid)
+
+        if create_full == True:
+            self._create_MandelBrot()
+        elif load == True:
+            self._load_Mandelbrot()
+
+    def _iterate(self, complex_number, max_iterations):
+        """
+        Method to iterate using complex numbers;
+
+        args:
+            complex_number: (Complex) Complex number
+            max_iterations: (Int)     Max iterations to check for convergence
+
+        returns:
+            interations:    (Int)     Amount of iterations done for divergence
+        """
+        zn = 0
+        for i in range(max_iterations):
+            if abs(zn) > 2:
+                break
+            zn = zn**2 + complex_number
+        return i + 1
+
+    def _to_box(self, xs, ys):
+        """
+        Method to scale continuous samples from the unit square to the box X * Y,
+        snapped to the grid values when snap is set.
+
+        args:
+            xs:         (1D array) X samples in [0, 1)
+            ys:         (1D array) Y samples in [0, 1)
+
+        returns:
+            samples:    (Tuple)    A tuple of the X and Y samples in the box
+        """
+        xs = self.X[0] + xs * (self.X[1] - self.X[0])
+        ys = self.Y[0] + ys * (self.Y[1] - self.Y[0])
+
+        if self.snap:
+            # Same step as np.arange uses, so the values equal X_grid and Y_grid
+            x_step = (self.X[0] + self.sharpness) - self.X[0]
+            y_step = (self.Y[0] + self.sharpness) - self.Y[0]
+            x_index = np.minimum(np.floor((xs - self.X[0]) / x_step), self.grid_size[0] - 1)
+            y_index = np.minimum(np.floor((ys - self.Y[0]) / y_step), self.grid_size[1] - 1)
+            xs = self.X[0] + x_index * x_step
+            ys = self.Y[0] + y_index * y_step
+
+        return xs, ys
+
+    @staticmethod
+    def _in_interior(xs, ys):
+        """
+        Method to check in closed form whether points lie in the main cardioid
+        or in the period-2 bulb. These points never diverge.
+
+        args:
+            xs:         (1D array) Real parts of the complex numbers
+            ys:         (1D array) Imaginary parts of the complex numbers
+
+        returns:
+            interior:   (1D array) Boolean mask of the points inside the cardioid or bulb
+        """
+        xs, ys = np.asarray(xs, dtype=float), np.asarray(ys, dtype=float)
+        q = (xs - 0.25)**2 + ys**2
+        cardioid = q * (q + (xs - 0.25)) < 0.25 * ys**2
+        bulb = (xs + 1)**2 + ys**2 < 0.0625
+        return cardioid | bulb
+
+    @staticmethod
+    def _iterate_batch(xs, ys, max_iterations, shortcuts=True):
+        """
+        Method to iterate a whole batch of complex numbers at once. Points are
+        retired from the active set as soon as they diverge, the returned
+        iteration counts are identical to calling _iterate per point.
+
+        With shortcuts, points in the main cardioid and period-2 bulb are never
+        iterated, and bounded orbits are retired as soon as they revisit an
+        earlier value exactly (Brent-style, the value is saved at every power of
+        two). An exact revisit means the orbit repeats forever, so the counts stay
+        identical to the brute-force iteration.
+
+        args:
+            xs:             (1D array) Real parts of the complex numbers
+            ys:             (1D array) Imaginary parts of the complex numbers
+            max_iterations: (Int)      Max iterations to check for convergence
+            shortcuts:      (Bool)     Use the interior check and cycle detection
+
+        returns:
+            iterations:     (1D array) Amount of iterations done for divergence, per point
+        """
+        c = np.asarray(xs, dtype=float) + 1j * np.asarray(ys, dtype=float)
+        iterations = np.full(c.shape, max_iterations, dtype=int)
+        c = c.ravel()
+
+        # Indices of the points which have not diverged yet
+        active = np.arange(c.size)
+        if shortcuts:
+            active = active[~MandelBrot._in_interior(c.real, c.imag)]
+            c = c[active]
+        zn = np.zeros(c.size, dtype=complex)
+        saved = zn.copy()
+
+        for i in range(max_iterations):
+            escaped = np.hypot(zn.real, zn.imag) > 2
+
+            # Retire the diverged points from the active set
+            if escaped.any():
+                iterations.flat[active[escaped]] = i + 1
+                keep = ~escaped
+                active, zn, c, saved = active[keep], zn[keep], c[keep], saved[keep]
+
+            if active.size == 0:
+                break
+
+            zn = zn * zn + c
+
+            if shortcuts:
+                # Save the orbit at powers of two, otherwise look for a cycle
+                if (i + 1) & i == 0:
+                    saved = zn.copy()
+                else:
+                    keep = zn != saved
+                    if not keep.all():
+                        active, zn, c, saved = active[keep], zn[keep], c[keep], saved[keep]
+
+        return iterations
+
+    def _create_MandelBrot(self, save=True, path='mandelbrotdata.npy', tile_size=512, workers=1):
+        """
+        Method for creating full mandelbrotset with as purpose drawing a fig.
+
+        The grid is rendered in tiles of tile_size * tile_size points. When saved, Z
+        is a memory-mapped .npy file and the finished tiles are recorded next to it
+        (path + '.tiles'), so an interrupted render resumes where it stopped. A
+        tile is only marked as finished after it has been flushed to disk. The box,
+        grid size and tile size are recorded as well (path + '.grid'), and the
+        render starts over when they differ from those of this mandelbrot.
+
+        args:
+            save:       (Bool)   Boolean to save the mandelbrot as a memory-mapped .npy file
+            path:       (String) File to render the mandelbrot in
+            tile_size:  (Int)    Amount of grid points per side of a tile
+            workers:    (Int)    Amount of processes to render the tiles with
+        """
+        shape = (len(self.Y_grid), len(self.X_grid))
+        n_tiles = (-(-shape[0] // tile_size), -(-shape[1] // tile_size))
+        tiles_path, grid_path = path + '.tiles', path + '.grid'
+        grid = np.array([*self.X, *self.Y, *self.grid_size, tile_size], dtype=float)
+
+        if not save:
+            self.Z = np.zeros(shape)
+            done = np.zeros(n_tiles, dtype=int)
+        elif (os.path.exists(path) & os.path.exists(tiles_path) & os.path.exists(grid_path)
+              and np.array_equal(np.load(grid_path), grid)):
+            self.Z = np.lib.format.open_memmap(path, mode='r+')
+            done = np.lib.format.open_memmap(tiles_path, mode='r+')
+        else:
+            self.Z = None
+
+        # Start over when the files on disk belong to another grid, the grid is
+        # recorded last so an interrupted start over is not mistaken for a render
+        if (self.Z is None) or (self.Z.shape != shape) or (done.shape != n_tiles):
+            if os.path.exists(grid_path):
+                os.remove(grid_path)
+            self.Z = np.lib.format.open_memmap(path, mode='w+', dtype=float, shape=shape)
+            done = np.lib.format.open_memmap(tiles_path, mode='w+', dtype=int, shape=n_tiles)
+            self.Z.flush()
+            done.flush()
+            with open(grid_path, 'wb') as outfile:
+                np.save(outfile, grid)
+
+        # A tile is done when it is rendered with the current amount of iterations
+        todo = [(i, j) for i, j in np.ndindex(*n_tiles) if done[i, j] != self.max_iterations]
+        tiles = [(i, j, self.X_grid[j * tile_size: (j + 1) * tile_size],
+                  self.Y_grid[i * tile_size: (i + 1) * tile_size]) for i, j in todo]
+
+        def store(rendered):
+            for (i, j), tile in rendered:
+                self.Z[i * tile_size: (i + 1) * tile_size, j * tile_size: (j + 1) * tile_size] = tile
+
+                if save:
+                    self.Z.flush()
+                    done[i, j] = self.max_iterations
+                    done.flush()
+
+        if workers == 1:
+            store(((i, j), _render_tile(xs, ys, self.max_iterations)) for i, j, xs, ys in tiles)
+            return
+
+        with ProcessPoolExecutor(workers) as pool:
+            futures = {pool.submit(_render_tile, xs, ys, self.max_iterations): (i, j) for i, j, xs, ys in tiles}
+            try:
+                store((futures[future], future.result()) for future in as_completed(futures))
+            finally:
+                for future in futures:
+                    future.cancel()
+
+    def _load_Mandelbrot(self, path='mandelbrotdata.npy'):
+        """
+        Method for lazily opening a rendered mandelbrot, the data is only read from
+        disk when it is used.
+
+        args:
+            path:   (String) File the mandelbrot was rendered in
+        """
+        self.Z = np.load(path, mmap_mode='r')
+
+        if os.path.exists(path + '.tiles'):
+            done = np.load(path + '.tiles', mmap_mode='r')
+            if np.any(done == 0):
+                print(f'Mandelbrot in {path} is not finished, {np.sum(done == 0)} tiles are missing.')
+
+    def RANDOM_SAMPLE(self, N):
+        """
+        Method to RANDOM sample the created grid.
+
+        args:
+            N:      (Int)   Amount to be sampled.
+        returns:
+            samples (Tuple) A tuple of N * X samples and N * Y samples.
+                            Being a total of N coordinates.
+        """
+        if self.continuous:
+            return self._to_box(self.rng.random(N), self.rng.random(N))
+
+        # No more samples than the grid divided spaces can be taken
+        if N > self.MaxSampleSize:
+            print(f'Sample size to big! Should be lower than {self.MaxSampleSize}')
+            return
+        else:
+            return (
+                self.rng.choice(self.X_grid, size=N, replace=True),
+                self.rng.choice(self.Y_grid, size=N, replace=True)
+            )
+
+    def RANDOM_SAMPLE_ISS(self, x, y, N, LHC=False):
+        """
+        Method to RANDOM sample the created grid, specifically for Intelligent Stratfied
+        Sampling.
+
+        args:
+            x:      (1D array) Array with possible x values to sample from.
+            y:      (1D array) Array with possible y values to sample from.
+            N:      (Int)      Amount to be sampled.
+            LHC:    (Bool)     Whether Latin Hypercube Sampling is used.
+
+        returns:
+            samples (Tuple) A tuple of N * x samples and N * y samples.
+                            Being a total of N coordinates.
+        """
+        # No more samples than the grid divided spaces can be taken
+        if N > self.MaxSampleSize:
+            print(f'Sample size to big! Should be lower than {self.MaxSampleSize}')
+            return
+        else:
+
+            # indexes of all samples
+            choicelist = list(range(len(x)))
+
+            # combine x and y arrays
+            X = np.column_stack((x,y))
+
+            # get indices of all sampled datapoints
+            inds = self.rng.choice(choicelist, size=N, replace=not(LHC))
+
+            # obtain chosen samples
+            X = X[inds]
+            new_x = X[:,0]
+            new_y = X[:,1]
+
+            return [new_x, new_y]
+
+    def LHC_SAMPLE(self, N):
+        """
+        Method to Latin Hyper Cube (LHC) sample the created grid.
+
+        args:
+            N:      (Int)   Amount to be sampled.
+        returns:
+            samples (Tuple) A tuple of N * X samples and N * Y samples.
+                            Being a total of N coordinates.
+        """
+        if self.continuous:
+            # One sample in each of the N intervals of both axes
+            xs = (self.rng.permutation(N) + self.rng.random(N)) / N
+            ys = (self.rng.permutation(N) + self.rng.random(N)) / N
+            return self._to_box(xs, ys)
+
+        # No more samples than the grid divided spaces can be taken
+        if N > self.MaxSampleSize:
+            print(f'Sample size to big! Should be lower than {self.MaxSampleSize}')
+            return
+        else:
+            return (
+                self.rng.choice(self.X_grid, size=N, replace=False),
+                self.rng.choice(self.Y_grid, size=N, replace=False)
+            )
+
+    def ORTHOGONAL_SAMPLE(self, N, grid_divide=4):
+        """
+        Method to ORTHOGONAL sample the created grid.
+
+        Every X and every Y grid value is used at most once, and the points are
+        spread as evenly as possible over the grid_divide**2 squares. All N points
+        are built at once from a permutation per stratum.
+
+        args:
+            N:              (Int)   Amount to be sampled.
+            grid_divide:    (Int)   The amount of spaces the X and Y
+                                    grid has to be divided in. Total
+                                    amount of squares is grid_divide**2.
+                                    A non-integer value is rounded down.
+        returns:
+            samples:        (Tuple) A tuple of N * X samples and N * Y samples.
+                                    Being a total of N coordinates.
+        """
+        if self.continuous:
+            # One sample in each of the N intervals of both axes, spread over the squares
+            x_choices, y_choices = _orthogonal_indices(self.rng, N, N, N, grid_divide)
+            return self._to_box((x_choices + self.rng.random(N)) / N, (y_choices + self.rng.random(N)) / N)
+
+        # No more samples than the grid divided spaces can be taken
+        if N > min(self.MaxSampleSize, len(self.Y_grid)):
+            print(f'Sample size to big! Should be lower than {min(self.MaxSampleSize, len(self.Y_grid))}')
+            return
+        else:
+            x_choices, y_choices = _orthogonal_indices(self.rng, N, len(self.X_grid), len(self.Y_grid), grid_divide)
+            return self.X_grid[x_choices], self.Y_grid[y_choices]
+
+    def SOBOL_SAMPLE(self, N):
+        """
+        Method to sample with a scrambled Sobol sequence. Every call scrambles the
+        sequence with a new draw of the random number generator, so replications
+        are independent and their variance is a valid error estimate. The balance
+        of the Sobol points is best when N is a power of 2.
+
+        args:
+            N:      (Int)   Amount to be sampled.
+        returns:
+            samples (Tuple) A tuple of N * X samples and N * Y samples.
+                            Being a total of N coordinates.
+        """
+        points = qmc.Sobol(d=2, scramble=True, seed=self.rng).random(N)
+        return self._from_unit(points[:, 0], points[:, 1])
+
+    def HALTON_SAMPLE(self, N):
+        """
+        Method to sample with a scrambled Halton sequence, scrambled anew for every
+        call like SOBOL_SAMPLE.
+
+        args:
+            N:      (Int)   Amount to be sampled.
+        returns:
+            samples (Tuple) A tuple of N * X samples and N * Y samples.
+                            Being a total of N coordinates.
+        """
+        points = qmc.Halton(d=2, scramble=True, seed=self.rng).random(N)
+        return self._from_unit(points[:, 0], points[:, 1])
+
+    def _from_unit(self, xs, ys):
+        """
+        Method to turn samples of the unit square into samples of the grid, or of
+        the box X * Y in continuous mode.
+
+        args:
+            xs:         (1D array) X samples in [0, 1)
+            ys:         (1D array) Y samples in [0, 1)
+
+        returns:
+            samples:    (Tuple)    A tuple of the X and Y samples
+        """
+        if self.continuous:
+            return self._to_box(xs, ys)
+
+        x_index = np.minimum((xs * len(self.X_grid)).astype(int), len(self.X_grid) - 1)
+        y_index = np.minimum((ys * len(self.Y_grid)).astype(int), len(self.Y_grid) - 1)
+        return self.X_grid[x_index], self.Y_grid[y_index]
+
+
+def _orthogonal_indices(rng, N, n_x, n_y, grid_divide):
+    """
+    Creates the indices of an orthogonal sample of N points on a grid of n_x by n_y.
+
+    The X and Y indices are split into int(grid_divide) strata, whose sizes differ
+    by at most one. The points are laid out over the squares along shifted
+    diagonals, so every row and column of squares gets N // k or N // k + 1 points,
+    and the larger strata take the extra points. Each stratum then hands out the
+    first indices of a random permutation, so no index is used twice.
+
+    args:
+        rng:            (Generator) Random number generator
+        N:              (Int)       Amount to be sampled, at most n_x and n_y
+        n_x:            (Int)       Amount of X grid values
+        n_y:            (Int)       Amount of Y grid values
+        grid_divide:    (Float)     The amount of strata per axis
+
+    returns:
+        x_choices:      (1D array)  Indices of the X values
+        y_choices:      (1D array)  Indices of the Y values
+    """
+    k = int(grid_divide)
+    if (k < 1) | (k > min(n_x, n_y)):
+        raise ValueError(f'grid_divide should be between 1 and {min(n_x, n_y)}, got {grid_divide}')
+
+    # Every square gets N // k**2 points, the rest is laid out along diagonals
+    extra = np.arange(N % k**2)
+    cols = np.concatenate((np.tile(np.arange(k), k * (N // k**2)), extra % k))
+    rows = np.concatenate((np.repeat(np.arange(k), k * (N // k**2)), (extra // k + extra % k) % k))
+
+    x_choices = _stratum_indices(rng, cols, n_x, k)
+    y_choices = _stratum_indices(rng, rows, n_y, k)
+    return x_choices, y_choices
+
+def _stratum_indices(rng, strata, n, k):
+    """
+    Gives each point a distinct index of its stratum, drawn without replacement.
+
+    args:
+        rng:        (Generator) Random number generator
+        strata:     (1D array)  Stratum of every point, before relabeling
+        n:          (Int)       Amount of grid values along the axis
+        k:          (Int)       Amount of strata along the axis
+
+    returns:
+        indices:    (1D array)  Grid index of every point
+    """
+    edges = (np.arange(k + 1) * n) // k
+    sizes = np.diff(edges)
+
+    # The strata with the most points are matched with the largest strata
+    counts = np.bincount(strata, minlength=k)
+    by_count = np.argsort(-counts, kind='stable')
+    by_size = np.lexsort((rng.random(k), -sizes))
+    label = np.empty(k, dtype=int)
+    label[by_count] = by_size
+    strata = label[strata]
+    counts = counts[np.argsort(label)]
+
+    # First indices of a random permutation per stratum, in order of the strata
+    picks = np.concatenate([edges[i] + rng.choice(sizes[i], size=counts[i], replace=False) for i in range(k)])
+
+    indices = np.empty(len(strata), dtype=int)
+    indices[np.argsort(strata, kind='stable')] = picks
+    return indices
+
+
+def _render_tile(xs, ys, max_iterations):
+    """
+    Renders one tile of the full mandelbrot.
+
+    args:
+        xs:             (1D array) X values of the columns of the tile
+        ys:             (1D array) Y values of the rows of the tile
+        max_iterations: (Int)      Maximum iterations to check for convergence
+
+    returns:
+        tile:           (2D array) 1 - iterations/max_iterations, with the rows along Y
+    """
+    X, Y = np.meshgrid(xs, ys)
+    return 1 - MandelBrot._iterate_batch(X, Y, max_iterations) / max_iterations
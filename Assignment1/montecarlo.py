@@ -0,0 +1,447 @@
+import numpy as np
+import copy
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from tqdm import tqdm
+from runningstats import RunningStats
+from results import new_seed
+
+# Mandelbrot set of a worker process, set once by the pool initializer
+_WORKER_MANDELBROT = None
+
+
+def monte_carlo(samples, max_iterations, mandelbrot, shortcuts=True):
+    """
+    Performs the monte carlo simulation.
+
+    args:
+        samples:        (Tuple) Tuple of N x samples and N y samples, as returned
+                                by the sampling methods of the MandelBrot Class
+        max_iterations: (Int)   Maximum amount of iterations to check for convergence
+        mandelbrot:     (Class) Mandelbrot set as created in the MandelBrot Class, its
+                                cache is consulted before iterating
+        shortcuts:      (Bool)  Skip the points which are known to be in the set, set
+                                to False for the brute-force iteration
+
+    returns:
+        area_estimation (Float) Estimation of the mandelbrot area
+    """
+
+    # Iterate all samples at once
+    iters = _escape_iterations(mandelbrot, samples[0], samples[1], max_iterations, shortcuts)
+    Inner = np.count_nonzero(iters >= max_iterations)
+
+    return  mandelbrot.area_size * (Inner/ len(samples[0]))
+
+def monte_carlo_sweep(samples, iterations, mandelbrot, shortcuts=True):
+    """
+    Performs the monte carlo simulation for a whole sweep of maximum iterations in
+    one pass. Every point is iterated once with the largest budget, a point with
+    escape count E is in the set for every budget of at most E, so the estimations
+    for all budgets follow from the cumulative histogram of the escape counts.
+
+    args:
+        samples:        (Tuple)     Tuple of N x samples and N y samples
+        iterations:     (1D array)  Maximum amounts of iterations to estimate the area for
+        mandelbrot:     (Class)     Mandelbrot set as created in the MandelBrot Class
+        shortcuts:      (Bool)      Skip the points which are known to be in the set
+
+    returns:
+        area_estimation (1D array)  Estimation of the mandelbrot area per amount of iterations
+    """
+    iterations = np.asarray(iterations, dtype=int)
+    iters = _escape_iterations(mandelbrot, samples[0], samples[1], iterations.max(), shortcuts)
+
+    # Amount of points with an escape count of at least i, for every i
+    Inner = np.cumsum(np.bincount(iters.ravel(), minlength=iterations.max() + 1)[::-1])[::-1]
+
+    return mandelbrot.area_size * (Inner[iterations] / len(samples[0]))
+
+def _escape_iterations(mandelbrot, xs, ys, max_iterations, shortcuts):
+    """
+    Method to iterate the samples, through the cache of the mandelbrot when it has one.
+    """
+    if mandelbrot.cache is not None:
+        return mandelbrot.cache.iterate(mandelbrot, xs, ys, max_iterations, shortcuts=shortcuts)
+    return mandelbrot._iterate_batch(xs, ys, max_iterations, shortcuts=shortcuts)
+
+def calc_error(estimation, baseline=1.510995):
+    """
+    Method to calculate error based on the baseline
+
+    args:
+        estimation: (Float) Estimation of the mandelbrotset
+        baseline:   (Float) Baseline as calculated in the previous methods
+    """
+    return abs(estimation - baseline)
+
+def _sample(mandelbrotset, samplesize, method):
+    """
+    Method to draw one sample with the given sampling method.
+
+    args:
+        mandelbrotset   (Class)         Mandelbrotset class as created above
+        samplesize      (Int)           Amount of samples
+        method:         (String)        Name of the sampling method
+
+    returns:
+        samples:        (Tuple)         A tuple of N * X samples and N * Y samples
+    """
+    if method.lower() == 'random':
+        samples = mandelbrotset.RANDOM_SAMPLE(N=samplesize)
+    elif method.lower() == 'lhc':
+        samples = mandelbrotset.LHC_SAMPLE(N=samplesize)
+    elif method.lower() == 'orthogonal':
+        if samplesize == 3025:
+            samples = mandelbrotset.ORTHOGONAL_SAMPLE(N=samplesize, grid_divide=5)
+        else:
+            samples = mandelbrotset.ORTHOGONAL_SAMPLE(N=samplesize)
+    elif method.lower() == 'orthogonal+':
+        samples = mandelbrotset.ORTHOGONAL_SAMPLE(N=samplesize, grid_divide=np.sqrt(samplesize))
+    elif method.lower() == 'sobol':
+        samples = mandelbrotset.SOBOL_SAMPLE(N=samplesize)
+    elif method.lower() == 'halton':
+        samples = mandelbrotset.HALTON_SAMPLE(N=samplesize)
+    else:
+        print('No known method selected.\nPerforms random sampling.')
+        samples = mandelbrotset.RANDOM_SAMPLE(N=samplesize)
+
+    return samples
+
+def _run_shard(mandelbrotset, samplesize, iterations, method, seeds, summarize=False, timed=False):
+    """
+    Method to run a shard of replications, every replication with its own stream.
+    When summarized, the shard only returns the running statistics of its
+    estimations and errors, to be merged with those of the other shards.
+
+    args:
+        mandelbrotset   (Class)         Mandelbrotset class as created above
+        samplesize      (Int)           Amount of samples
+        iterations:     (Int)           Iterations done to check for convergence, or an
+                                        array of iterations to sweep in one pass
+        method:         (String)        Name of the sampling method
+        seeds:          (List)          SeedSequences, one per replication
+        summarize:      (Bool)          Return the running statistics instead of the estimations
+        timed:          (Bool)          Return the wall time of every replication as well
+
+    returns:
+        estimations:    (List)          Area estimation per replication, an array for a sweep,
+                                        or a list with the RunningStats of the estimations
+                                        and of the errors. Timed, (estimation, wall time) pairs
+    """
+    mandelbrotset = copy.copy(mandelbrotset)
+    estimations, wall_times = [], []
+    for seed in seeds:
+        start = time.perf_counter()
+        mandelbrotset.rng = np.random.default_rng(seed)
+        samples = _sample(mandelbrotset, samplesize, method)
+        if np.ndim(iterations) == 0:
+            estimations.append(monte_carlo(samples, iterations, mandelbrotset))
+        else:
+            estimations.append(monte_carlo_sweep(samples, iterations, mandelbrotset))
+        wall_times.append(time.perf_counter() - start)
+
+    if summarize:
+        stats, errors = RunningStats(), RunningStats()
+        for area_estimation in estimations:
+            stats.update(area_estimation), errors.update(calc_error(area_estimation))
+        return [(stats, errors)]
+
+    if timed:
+        return list(zip(estimations, wall_times))
+    return estimations
+
+def _init_worker(mandelbrotset):
+    """
+    Initializer of the worker processes, so the grid is only sent once per worker.
+    """
+    global _WORKER_MANDELBROT
+    _WORKER_MANDELBROT = mandelbrotset
+
+def _run_worker_shard(samplesize, iterations, method, seeds, summarize, timed):
+    """
+    Method to run a shard of replications in a worker process. The cache counters
+    of the shard are returned as well, the cache of the worker is not sent back.
+    """
+    cache = _WORKER_MANDELBROT.cache
+    before = cache.counts() if cache is not None else (0, 0, 0)
+    estimations = _run_shard(_WORKER_MANDELBROT, samplesize, iterations, method, seeds, summarize, timed)
+    after = cache.counts() if cache is not None else (0, 0, 0)
+    return estimations, tuple(a - b for a, b in zip(after, before))
+
+def replications(mandelbrotset, samplesize, iterations, runs, method='random', seed=None, workers=1, shard_size=1,
+                 summarize=False, timed=False):
+    """
+    Generator which runs replications over a process pool. Every replication gets
+    its own stream, spawned from a single SeedSequence, and the estimations are
+    yielded in replication order. The results therefore only depend on the seed and
+    not on the amount of workers. Closing the generator cancels the pending shards.
+
+    args:
+        mandelbrotset   (Class)         Mandelbrotset class as created above
+        samplesize      (Int)           Amount of samples
+        iterations:     (Int)           Iterations done to check for convergence, or an
+                                        array of iterations to sweep in one pass
+        runs            (Int)           Maximum amount of replications
+        method:         (String)        Name of the sampling method
+        seed:           (Int)           Seed from which all streams are spawned
+        workers:        (Int)           Amount of processes, 1 runs in this process
+        shard_size:     (Int)           Amount of replications per task
+        summarize:      (Bool)          Yield the running statistics per shard instead
+        timed:          (Bool)          Yield (estimation, wall time) pairs
+
+    yields:
+        estimation:     (Float)         Area estimation of the next replication, an array
+                                        for a sweep, or the RunningStats of the estimations
+                                        and of the errors of the next shard
+    """
+    seeds = np.random.SeedSequence(seed).spawn(runs)
+    shards = (seeds[i:i + shard_size] for i in range(0, runs, shard_size))
+
+    if workers == 1:
+        for shard in shards:
+            yield from _run_shard(mandelbrotset, samplesize, iterations, method, shard, summarize, timed)
+        return
+
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(mandelbrotset,)) as pool:
+
+        # Keep every worker busy with a second shard in line
+        pending = deque(pool.submit(_run_worker_shard, samplesize, iterations, method, shard, summarize, timed)
+                        for shard in islice(shards, 2 * workers))
+        try:
+            while pending:
+                estimations, counts = pending.popleft().result()
+                if mandelbrotset.cache is not None:
+                    mandelbrotset.cache.add_counts(counts)
+                for shard in islice(shards, 1):
+                    pending.append(pool.submit(_run_worker_shard, samplesize, iterations, method, shard, summarize, timed))
+                yield from estimations
+        finally:
+            for future in pending:
+                future.cancel()
+
+def estimate_area(mandelbrotset, samplesize, iterations, minimal_runs=30, method='random', seed=None, workers=1,
+                  store=None):
+    """
+    Method to estimate area for a samplesize, iteration and runs. Replications are
+    added until the stopping rule stdev/sqrt(n) < d holds, with at most 101 runs.
+
+    args:
+        mandelbrotset   (Class)         Mandelbrotset class as created above
+        samplesize      (Int)           Amount of samples
+        iterations:     (Int)           Iterations done to check for convergence
+        minimal_runs    (Int)           N of runs to calculate mean and variance of the samplesize
+                                        and iterations given
+        method:         (String)        Name of the sampling method
+        seed:           (Int)           Seed from which the streams of the replications are spawned
+        workers:        (Int)           Amount of processes to spread the replications over
+        store:          (Class)         ResultStore to append every replication to
+
+    returns:
+        MeanEstimation: (Float)         Mean of all estimations done for the given samplesize
+                                        and iterations
+        MeanError:      (Float)         Mean of all errors done
+        variance:       (Float)         Variance of the estimations
+        stdev:          (Float)         Standard deviationf of the estimations
+    """
+    stats, errors = RunningStats(), RunningStats()
+    stdev, d = 100, 1.96
+    seed = new_seed() if (store is not None) & (seed is None) else seed
+
+    runs = replications(mandelbrotset, samplesize, iterations, 101, method=method, seed=seed, workers=workers,
+                        timed=True)
+    for area_estimation, wall_time in runs:
+
+        stats.update(area_estimation), errors.update(calc_error(area_estimation))
+        counter = stats.n
+
+        if store is not None:
+            store.append(method=method, N=samplesize, iterations=iterations, seed=seed, replication=counter - 1,
+                         estimate=area_estimation, error=calc_error(area_estimation), wall_time=wall_time)
+
+        if counter > 1:
+            variance = stats.variance
+            stdev = stats.stdev
+
+        if counter > 100:
+            print('Calculation not finished within confidence interval of 95%\n')
+            break
+
+        if ((counter + 1 > minimal_runs) &
+           ((stdev/np.sqrt(counter + 1)) <= d)):
+            break
+
+    runs.close()
+    if store is not None:
+        store.flush()
+
+    return [stats.mean, errors.mean, variance, stdev]
+
+def estimate_area_iterations(mandelbrotset, samplesize, iterations, runs=30, method='random', seed=None, workers=1):
+    """
+    Method to estimate the area for a whole sweep of iterations. Every replication
+    samples once and iterates the samples once with the largest budget, so the
+    sweep costs as much as a single estimation with the largest budget.
+
+    args:
+        mandelbrotset   (Class)         Mandelbrotset class as created above
+        samplesize      (Int)           Amount of samples
+        iterations:     (1D array)      Iterations to check for convergence with
+        runs            (Int)           Runs
+        method:         (String)        Name of the sampling method
+        seed:           (Int)           Seed from which the streams of the replications are spawned
+        workers:        (Int)           Amount of processes to spread the replications over
+
+    returns:
+        MeanEstimation: (1D array)      Mean of all estimations per amount of iterations
+        MeanError:      (1D array)      Mean of all errors per amount of iterations
+        variance:       (1D array)      Variance of the estimations per amount of iterations
+        stdev:          (1D array)      Standard deviation of the estimations per amount of iterations
+    """
+    stats, errors = RunningStats(), RunningStats()
+
+    # Every shard summarizes its replications, the summaries are merged
+    for shard_stats, shard_errors in replications(mandelbrotset, samplesize, np.asarray(iterations), runs,
+                                                  method=method, seed=seed, workers=workers,
+                                                  shard_size=4, summarize=True):
+        stats, errors = stats.merge(shard_stats), errors.merge(shard_errors)
+
+    return [stats.mean, errors.mean, stats.variance, stats.stdev]
+
+def estimate_area_boxplot(mandelbrotset, samplesize, iterations, runs, method='random', seed=None, workers=1,
+                          summary=False, store=None):
+    """
+    Method to estimate area for a samplesize, iteration and runs for the purpose
+    of creating the boxplots. With summary, the estimations are not kept, only
+    the statistics of the boxplot in constant memory, with P² sketches for the
+    quartiles.
+
+    args:
+        mandelbrotset   (Class)         Mandelbrotset class as created above
+        samplesize      (Int)           Amount of samples
+        iterations:     (Int)           Iterations done to check for convergence
+        runs            (Int)           Runs
+        method:         (String)        Name of the sampling method
+        seed:           (Int)           Seed from which the streams of the replications are spawned
+        workers:        (Int)           Amount of processes to spread the replications over
+        summary:        (Bool)          Only return the statistics of the boxplot
+        store:          (Class)         ResultStore to append every replication to
+
+    returns:
+        MeanEstimation: (Float)         Mean of all estimations done for the given samplesize
+                                        and iterations
+        MeanError:      (Float)         Mean of all errors done
+
+        or with summary:
+        summary:        (Dict)          Mean, variance, stdev, min, quartiles and max of the
+                                        estimations and the mean error
+    """
+    AllEstimations, AllErrors, AllMethods = [], [], []
+    stats, errors = RunningStats(quantiles=(0.25, 0.5, 0.75)), RunningStats()
+    minimum, maximum = np.inf, -np.inf
+    seed = new_seed() if (store is not None) & (seed is None) else seed
+
+    for replication, (area_estimation, wall_time) in enumerate(tqdm(
+            replications(mandelbrotset, samplesize, iterations, runs, method=method, seed=seed, workers=workers,
+                         timed=True), total=runs)):
+
+        error = calc_error(area_estimation)
+
+        if store is not None:
+            store.append(method=method, N=samplesize, iterations=iterations, seed=seed, replication=replication,
+                         estimate=area_estimation, error=error, wall_time=wall_time)
+
+        if summary:
+            stats.update(area_estimation), errors.update(error)
+            minimum, maximum = min(minimum, area_estimation), max(maximum, area_estimation)
+        else:
+            AllEstimations.append(area_estimation), AllErrors.append(error), AllMethods.append(method)
+
+    if store is not None:
+        store.flush()
+
+    if summary:
+        quartiles = stats.quantiles()
+        return {'Method': method, 'Mean': stats.mean, 'Variance': stats.variance, 'StDev': stats.stdev,
+                'Min': minimum, 'Q1': quartiles[0.25], 'Median': quartiles[0.5], 'Q3': quartiles[0.75],
+                'Max': maximum, 'MeanError': errors.mean}
+
+    return (AllEstimations, AllErrors, AllMethods)
+
+def _stratified_sample(mandelbrotset, counts, strata):
+    """
+    Method to draw uniform samples inside each of the strata * strata squares of the box.
+
+    args:
+        mandelbrotset   (Class)         Mandelbrotset class as created above
+        counts:         (1D array)      Amount of samples per square, row major along Y
+        strata:         (Int)           Amount of squares per axis
+
+    returns:
+        samples:        (Tuple)         A tuple of the X and Y samples
+        labels:         (1D array)      Square of every sample
+    """
+    labels = np.repeat(np.arange(strata**2), counts)
+    xs = (labels % strata + mandelbrotset.rng.random(len(labels))) / strata
+    ys = (labels // strata + mandelbrotset.rng.random(len(labels))) / strata
+    return mandelbrotset._from_unit(xs, ys), labels
+
+def estimate_area_adaptive(mandelbrotset, samplesize, iterations, strata=16, pilot_fraction=0.2, min_samples=2):
+    """
+    Method to estimate the area with stratified sampling, concentrated on the boundary.
+
+    A pilot pass samples every square evenly and classifies it by its fraction of
+    points inside the set. The rest of the samples is allocated with Neyman
+    allocation, proportional to the estimated standard deviation of every square,
+    so squares which are clearly in or out only get min_samples. The estimation
+    only uses the second pass, its allocation is fixed given the pilot, so the
+    estimation is unbiased.
+
+    args:
+        mandelbrotset   (Class)         Mandelbrotset class as created above
+        samplesize      (Int)           Total amount of samples, pilot included
+        iterations:     (Int)           Iterations done to check for convergence
+        strata:         (Int)           Amount of squares per axis
+        pilot_fraction: (Float)         Fraction of the samples spent on the pilot
+        min_samples:    (Int)           Minimal samples per square in the second pass, at least 2
+
+    returns:
+        AreaEstimation: (Float)         Estimation of the mandelbrot area
+        Error:          (Float)         Error with respect to the baseline
+        variance:       (Float)         Variance of the estimation
+        interval:       (Tuple)         95% confidence interval of the estimation
+    """
+    if min_samples < 2:
+        raise ValueError(f'min_samples should be at least 2 for the variance of a square, got {min_samples}')
+
+    n_strata = strata**2
+    pilot = max(2, int(samplesize * pilot_fraction) // n_strata)
+    budget = samplesize - pilot * n_strata
+    if budget < min_samples * n_strata:
+        raise ValueError(f'Sample size to small! Should be at least {(pilot + min_samples) * n_strata}')
+
+    # Pilot pass, smoothed so that squares without mixed points still get a small share
+    samples, labels = _stratified_sample(mandelbrotset, np.full(n_strata, pilot), strata)
+    inner = _escape_iterations(mandelbrotset, samples[0], samples[1], iterations, True) >= iterations
+    p = (np.bincount(labels, weights=inner, minlength=n_strata) + 0.5) / (pilot + 1)
+
+    # Neyman allocation of the rest, with largest remainder rounding
+    share = np.sqrt(p * (1 - p))
+    allocation = min_samples + (budget - min_samples * n_strata) * share / share.sum()
+    counts = np.floor(allocation).astype(int)
+    counts[np.argsort(counts - allocation)[:budget - counts.sum()]] += 1
+
+    # Second pass, every square has an area of area_size / n_strata
+    samples, labels = _stratified_sample(mandelbrotset, counts, strata)
+    inner = _escape_iterations(mandelbrotset, samples[0], samples[1], iterations, True) >= iterations
+    p = np.bincount(labels, weights=inner, minlength=n_strata) / counts
+
+    area_size = mandelbrotset.area_size / n_strata
+    area_estimation = area_size * p.sum()
+    variance = np.sum(area_size**2 * p * (1 - p) / (counts - 1))
+    half_width = 1.96 * np.sqrt(variance)
+
+    return [area_estimation, calc_error(area_estimation), variance,
+            (area_estimation - half_width, area_estimation + half_width)]
@@ -0,0 +1,209 @@
+import numpy as np
+import pandas as pd
+import glob
+import os
+import pickle
+import time
+import uuid
+
+
+class ResultStore():
+
+    """
+    Class which stores the replications of the experiments as rows of a columnar
+    log. Rows are buffered and written as compressed .npz chunks with one array per
+    column. A chunk is written under a temporary name and renamed when complete, so
+    runs can append to the same store at the same time, and a reader only ever sees
+    whole chunks. Every chunk records the version of the format it was written in.
+    """
+
+    VERSION = 1
+    COLUMNS = {
+        'method': str,
+        'N': np.int64,
+        'iterations': np.int64,
+        'seed': np.int64,
+        'replication': np.int64,
+        'estimate': float,
+        'error': float,
+        'wall_time': float,
+    }
+
+    def __init__(self, directory='results', chunk_size=1000):
+        """
+        Initilization of the class.
+
+        args:
+            directory:  (String) Directory of the chunks
+            chunk_size: (Int)    Amount of rows which are buffered before a chunk is written
+
+        returns:
+            ResultStore (Class)
+        """
+        self.directory = directory
+        self.chunk_size = chunk_size
+        self.buffer = {column: [] for column in self.COLUMNS}
+        os.makedirs(directory, exist_ok=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.flush()
+
+    def append(self, **row):
+        """
+        Method to append a replication, with a value for every column of COLUMNS.
+        """
+        if set(row) != set(self.COLUMNS):
+            raise ValueError(f'A row needs the columns {list(self.COLUMNS)}, got {list(row)}')
+
+        for column, value in row.items():
+            self.buffer[column].append(value)
+
+        if len(self.buffer['estimate']) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        """
+        Method to write the buffered rows as a new chunk.
+        """
+        if len(self.buffer['estimate']) == 0:
+            return
+
+        arrays = {column: np.asarray(values, dtype=self.COLUMNS[column]) for column, values in self.buffer.items()}
+        arrays['version'] = np.asarray(self.VERSION)
+
+        # Unique name per writer, renamed only when the chunk is complete
+        name = f'chunk-{time.time_ns()}-{os.getpid()}-{uuid.uuid4().hex[:8]}.npz'
+        temporary = os.path.join(self.directory, '.' + name)
+        with open(temporary, 'wb') as outfile:
+            np.savez_compressed(outfile, **arrays)
+        os.replace(temporary, os.path.join(self.directory, name))
+
+        self.buffer = {column: [] for column in self.COLUMNS}
+
+    def load(self, columns=None, filters=None):
+        """
+        Method to read the store. Only the columns which are asked for or filtered
+        on are read from the chunks.
+
+        args:
+            columns:    (List)      Columns to load, all columns when None
+            filters:    (Dict)      Column with the value, list of values or function
+                                    returning a boolean mask, that the rows should match
+
+        returns:
+            results:    (DataFrame) The matching rows
+        """
+        columns = list(self.COLUMNS) if columns is None else list(columns)
+        filters = {} if filters is None else filters
+        parts = []
+
+        for path in sorted(glob.glob(os.path.join(self.directory, 'chunk-*.npz'))):
+            with np.load(path) as chunk:
+                if int(chunk['version']) > self.VERSION:
+                    raise ValueError(f'{path} has version {int(chunk["version"])}, '
+                                     f'this store reads up to version {self.VERSION}')
+
+                # Filter first, so the other columns are only read for matching chunks
+                mask, read = None, {}
+                for column, condition in filters.items():
+                    values = read[column] = chunk[column]
+                    if callable(condition):
+                        match = condition(values)
+                    elif isinstance(condition, (list, tuple, set, np.ndarray)):
+                        match = np.isin(values, list(condition))
+                    else:
+                        match = values == condition
+                    mask = match if mask is None else mask & match
+
+                if (mask is not None) and (not mask.any()):
+                    continue
+
+                part = {column: read[column] if column in read else chunk[column] for column in columns}
+                if mask is not None:
+                    part = {column: values[mask] for column, values in part.items()}
+                parts.append(pd.DataFrame(part))
+
+        if not parts:
+            return pd.DataFrame({column: np.array([], dtype=self.COLUMNS[column]) for column in columns})
+        return pd.concat(parts, ignore_index=True)
+
+
+def new_seed():
+    """
+    Creates a fresh seed which fits the seed column, for runs without a given seed.
+
+    returns:
+        seed:   (Int)   Random non-negative 63 bit seed
+    """
+    return int(np.random.SeedSequence().generate_state(1, np.uint64)[0] >> 1)
+
+def import_boxplot_csv(path, store, samplesize, iterations, baseline=1.510995):
+    """
+    Imports a csv with a column of area estimations per method, like
+    final_boxplot.csv, into the store. The seeds of these runs are unknown, -1.
+
+    args:
+        path:       (String) Path of the csv
+        store:      (Class)  ResultStore to append to
+        samplesize: (Int)    Amount of samples of the estimations
+        iterations: (Int)    Iterations of the estimations
+        baseline:   (Float)  Baseline to calculate the errors with
+    """
+    df = pd.read_csv(path, index_col=0)
+    for method in df.columns:
+        for replication, estimate in enumerate(df[method]):
+            store.append(method=method, N=samplesize, iterations=iterations, seed=-1, replication=replication,
+                         estimate=estimate, error=abs(estimate - baseline), wall_time=np.nan)
+    store.flush()
+
+def import_grid_data(path, store, samplesize=3025, iterations=100, methods=('random', 'intelligent random', 'LHC',
+                                                                          'intelligent LHC'), baseline=1.510995):
+    """
+    Imports a pickled list with a list of area estimations per method, like
+    new_grid_data_1637590099.620807 which was run on another computer, into the
+    store. Its intelligent random and intelligent LHC lists are also in
+    final_boxplot.csv, its random and LHC lists are other runs than those in the
+    csv. When both files are imported, give methods like ('random 2', None,
+    'LHC 2', None) to keep them apart. The seeds of these runs are unknown, -1.
+
+    args:
+        path:       (String) Path of the pickle
+        store:      (Class)  ResultStore to append to
+        samplesize: (Int)    Amount of samples of the estimations
+        iterations: (Int)    Iterations of the estimations
+        methods:    (List)   Method per list of estimations, None to skip a list
+        baseline:   (Float)  Baseline to calculate the errors with
+    """
+    with open(path, 'rb') as infile:
+        estimations = pickle.load(infile)
+
+    if len(estimations) != len(methods):
+        raise ValueError(f'{path} has {len(estimations)} lists of estimations, got {len(methods)} methods')
+
+    for method, estimates in zip(methods, estimations):
+        if method is None:
+            continue
+        for replication, estimate in enumerate(estimates):
+            store.append(method=method, N=samplesize, iterations=iterations, seed=-1, replication=replication,
+                         estimate=estimate, error=abs(estimate - baseline), wall_time=np.nan)
+    store.flush()
+
+def read_baselines(path):
+    """
+    Reads a pickled dict with the baseline area per method, like baselines. These
+    are means over 30 runs with 1e5 samples and 1000 iterations, not single
+    replications, so they are not stored as rows but can be given as the baseline
+    of the imports. Methods without a baseline are left out.
+
+    args:
+        path:       (String) Path of the pickle
+
+    returns:
+        baselines:  (Dict)   Baseline area per method
+    """
+    with open(path, 'rb') as infile:
+        baselines = pickle.load(infile)
+    return {method: float(area) for method, area in baselines.items() if not np.isnan(area)}
@@ -0,0 +1,166 @@
+import numpy as np
+
+
+class RunningStats():
+
+    """
+    Class which keeps the mean and variance of a stream of estimations with the
+    algorithm of Welford, in constant memory. Partial states, for example of the
+    shards of a process pool, are combined with merge. Optionally it keeps P²
+    sketches of some quantiles, for the summaries of the boxplots.
+    """
+
+    def __init__(self, quantiles=()):
+        """
+        Initilization of the class.
+
+        args:
+            quantiles:  (Tuple) Quantiles to keep a P² sketch of, for example (0.25, 0.5, 0.75)
+        """
+        self.n = 0
+        self.mean = 0.0
+        self.M2 = 0.0
+        self.sketches = [P2Quantile(p) for p in quantiles]
+
+    def update(self, x):
+        """
+        Method to add an estimation to the statistics. The estimation may be an
+        array, the statistics are then kept per element.
+
+        args:
+            x:      (Float) Estimation
+        """
+        self.n += 1
+        delta = x - self.mean
+        self.mean = self.mean + delta / self.n
+        self.M2 = self.M2 + delta * (x - self.mean)
+
+        for sketch in self.sketches:
+            sketch.update(x)
+
+    def merge(self, other):
+        """
+        Method to combine the statistics of two parts, following the parallel
+        algorithm of Chan et al. P² sketches cannot be merged, so the combined
+        statistics only keep the mean and variance.
+
+        args:
+            other:  (Class) RunningStats of the other part
+
+        returns:
+            merged: (Class) RunningStats of both parts together
+        """
+        merged = RunningStats()
+        merged.n = self.n + other.n
+        if merged.n == 0:
+            return merged
+
+        delta = other.mean - self.mean
+        merged.mean = self.mean + delta * other.n / merged.n
+        merged.M2 = self.M2 + other.M2 + delta**2 * self.n * other.n / merged.n
+        return merged
+
+    @property
+    def variance(self):
+        """
+        Sample variance (ddof=1) of the estimations.
+        """
+        if self.n < 2:
+            return np.nan
+        return self.M2 / (self.n - 1)
+
+    @property
+    def stdev(self):
+        """
+        Sample standard deviation of the estimations.
+        """
+        return np.sqrt(self.variance)
+
+    def quantiles(self):
+        """
+        Method to give the sketched quantiles.
+
+        returns:
+            quantiles:  (Dict)  Estimation of every sketched quantile
+        """
+        return {sketch.p: sketch.value() for sketch in self.sketches}
+
+
+class P2Quantile():
+
+    """
+    Class which estimates a quantile of a stream with the P² algorithm of Jain and
+    Chlamtac. It keeps five markers, so the memory does not grow with the stream.
+    """
+
+    def __init__(self, p):
+        """
+        Initilization of the class.
+
+        args:
+            p:  (Float) Quantile to estimate, between 0 and 1
+        """
+        self.p = p
+        self.heights = []
+        self.positions = [1, 2, 3, 4, 5]
+        self.desired = [1, 1 + 2 * p, 1 + 4 * p, 3 + 2 * p, 5]
+        self.increments = [0, p / 2, p, (1 + p) / 2, 1]
+
+    def update(self, x):
+        """
+        Method to add an observation to the sketch.
+
+        args:
+            x:  (Float) Observation
+        """
+        q, n = self.heights, self.positions
+
+        # The first five observations are the initial markers
+        if len(q) < 5:
+            q.append(x)
+            q.sort()
+            return
+
+        # Find the cell of the observation and move the extreme markers
+        if x < q[0]:
+            q[0], k = x, 0
+        elif x >= q[4]:
+            q[4], k = x, 3
+        else:
+            k = next(i for i in range(4) if q[i] <= x < q[i + 1])
+
+        for i in range(k + 1, 5):
+            n[i] += 1
+        for i in range(5):
+            self.desired[i] += self.increments[i]
+
+        # Adjust the heights of the middle markers when they are off position
+        for i in range(1, 4):
+            d = self.desired[i] - n[i]
+            if ((d >= 1) & (n[i + 1] - n[i] > 1)) | ((d <= -1) & (n[i - 1] - n[i] < -1)):
+                d = 1 if d > 0 else -1
+                height = self._parabolic(i, d)
+                if not q[i - 1] < height < q[i + 1]:
+                    height = q[i] + d * (q[i + d] - q[i]) / (n[i + d] - n[i])
+                q[i] = height
+                n[i] += d
+
+    def _parabolic(self, i, d):
+        """
+        Piecewise parabolic prediction of the height of marker i moved by d.
+        """
+        q, n = self.heights, self.positions
+        return q[i] + d / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i]) +
+            (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1]))
+
+    def value(self):
+        """
+        Method to give the current estimation of the quantile.
+
+        returns:
+            quantile:   (Float) Estimation of the quantile
+        """
+        if len(self.heights) < 5:
+            return np.quantile(self.heights, self.p) if self.heights else np.nan
+        return self.heights[2]
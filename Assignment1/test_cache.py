@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+from cache import EscapeCache
+from mandelbrot import MandelBrot
+
+
+@pytest.fixture(scope='module')
+def points():
+    mandelbrot = MandelBrot(MaxSampleSize=100)
+    rng = np.random.default_rng(1)
+    xs = rng.choice(mandelbrot.X_grid, 3000)
+    ys = rng.choice(mandelbrot.Y_grid, 3000)
+    return mandelbrot, xs, ys
+
+
+@pytest.mark.parametrize('directory', [None, 'disk'])
+def test_cache_equals_uncached_kernel(points, tmp_path, directory):
+    mandelbrot, xs, ys = points
+    cache = EscapeCache(None if directory is None else tmp_path / directory)
+    # A larger budget than stored has to iterate again, a smaller one does not
+    for max_iterations in (50, 100, 30, 100):
+        expected = mandelbrot._iterate_batch(xs, ys, max_iterations)
+        np.testing.assert_array_equal(cache.iterate(mandelbrot, xs, ys, max_iterations), expected)
+    assert cache.hits > 0
+
+
+def test_store_on_disk_is_shared(points, tmp_path):
+    mandelbrot, xs, ys = points
+    EscapeCache(tmp_path).iterate(mandelbrot, xs, ys, 50)
+
+    cache = EscapeCache(tmp_path)
+    np.testing.assert_array_equal(cache.iterate(mandelbrot, xs, ys, 50), mandelbrot._iterate_batch(xs, ys, 50))
+    assert cache.misses == 0 and cache.disk_hits > 0
+
+
+def test_points_off_the_grid_are_iterated(points):
+    mandelbrot, xs, ys = points
+    cache = EscapeCache(None)
+    xs = xs + mandelbrot.sharpness / 3
+    for _ in range(2):
+        np.testing.assert_array_equal(cache.iterate(mandelbrot, xs, ys, 50), mandelbrot._iterate_batch(xs, ys, 50))
+    assert cache.hits == 0
+
+
+def test_memory_is_bounded(points):
+    mandelbrot, xs, ys = points
+    cache = EscapeCache(None, max_memory=100)
+    cache.iterate(mandelbrot, xs, ys, 50)
+    assert len(cache.memory) == 100
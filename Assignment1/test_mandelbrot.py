@@ -0,0 +1,29 @@
+import numpy as np
+import pytest
+
+from mandelbrot import MandelBrot
+
+
+@pytest.fixture(scope='module')
+def grid():
+    mandelbrot = MandelBrot(MaxSampleSize=400)
+    xs, ys = np.meshgrid(mandelbrot.X_grid, mandelbrot.Y_grid)
+    return mandelbrot, xs.ravel(), ys.ravel()
+
+
+@pytest.mark.parametrize('shortcuts', [True, False])
+def test_iterate_batch_equals_iterate_on_full_grid(grid, shortcuts):
+    mandelbrot, xs, ys = grid
+    scalar = np.array([mandelbrot._iterate(complex(x, y), 50) for x, y in zip(xs, ys)])
+    np.testing.assert_array_equal(mandelbrot._iterate_batch(xs, ys, 50, shortcuts=shortcuts), scalar)
+
+
+@pytest.mark.parametrize('max_iterations', [50, 300])
+def test_iterate_batch_equals_iterate_near_minus_two(grid, max_iterations):
+    # |z| is close to 2 along Re = -2, where np.abs and abs round differently
+    mandelbrot, xs, ys = grid
+    near = xs < -1.9
+    scalar = np.array([mandelbrot._iterate(complex(x, y), max_iterations) for x, y in zip(xs[near], ys[near])])
+    np.testing.assert_array_equal(mandelbrot._iterate_batch(xs[near], ys[near], max_iterations), scalar)
+    assert mandelbrot._iterate_batch([-2.0], [1.24e-14], max_iterations)[0] == \
+        mandelbrot._iterate(complex(-2.0, 1.24e-14), max_iterations)
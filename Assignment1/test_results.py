@@ -0,0 +1,77 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from results import ResultStore, import_boxplot_csv, import_grid_data
+
+BOXPLOT = os.path.join(os.path.dirname(__file__), 'final_boxplot.csv')
+GRID_DATA = os.path.join(os.path.dirname(__file__), 'new_grid_data_1637590099.620807')
+
+
+def row(method='random', replication=0, **values):
+    return {'method': method, 'N': 100, 'iterations': 50, 'seed': 7, 'replication': replication,
+            'estimate': 1.5, 'error': 0.01, 'wall_time': 0.1, **values}
+
+
+def test_append_and_load_over_chunks(tmp_path):
+    with ResultStore(tmp_path, chunk_size=3) as store:
+        for replication in range(7):
+            store.append(**row('LHC' if replication % 2 else 'random', replication, estimate=replication))
+    assert len(list(tmp_path.glob('chunk-*.npz'))) == 3
+
+    df = ResultStore(tmp_path).load()
+    assert list(df.columns) == list(ResultStore.COLUMNS)
+    assert sorted(df['replication']) == list(range(7))
+
+
+def test_load_filters_and_columns(tmp_path):
+    with ResultStore(tmp_path, chunk_size=2) as store:
+        for replication in range(6):
+            store.append(**row('LHC' if replication % 2 else 'random', replication))
+
+    store = ResultStore(tmp_path)
+    df = store.load(columns=['replication'], filters={'method': 'LHC'})
+    assert list(df.columns) == ['replication']
+    assert sorted(df['replication']) == [1, 3, 5]
+    assert len(store.load(filters={'method': ['LHC', 'random'], 'replication': lambda r: r < 2})) == 2
+    assert store.load(filters={'method': 'orthogonal'}).empty
+
+
+def test_rows_need_every_column(tmp_path):
+    store = ResultStore(tmp_path)
+    values = row()
+    del values['seed']
+    with pytest.raises(ValueError):
+        store.append(**values)
+
+
+def test_newer_versions_are_refused(tmp_path):
+    with ResultStore(tmp_path) as store:
+        store.append(**row())
+    ResultStore.VERSION, version = 0, ResultStore.VERSION
+    try:
+        with pytest.raises(ValueError):
+            ResultStore(tmp_path).load()
+    finally:
+        ResultStore.VERSION = version
+
+
+def test_import_boxplot_csv(tmp_path):
+    store = ResultStore(tmp_path)
+    import_boxplot_csv(BOXPLOT, store, samplesize=3025, iterations=100)
+    csv = pd.read_csv(BOXPLOT, index_col=0)
+
+    df = store.load()
+    assert set(df['method']) == set(csv.columns)
+    np.testing.assert_array_equal(df[df['method'] == 'LHC'].sort_values('replication')['estimate'], csv['LHC'])
+    assert (df['seed'] == -1).all()
+
+
+def test_import_grid_data_skips_methods(tmp_path):
+    store = ResultStore(tmp_path)
+    import_grid_data(GRID_DATA, store, methods=('random 2', None, 'LHC 2', None))
+    assert store.load()['method'].value_counts().to_dict() == {'random 2': 1000, 'LHC 2': 1000}
+    with pytest.raises(ValueError):
+        import_grid_data(GRID_DATA, store, methods=('random',))
@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from runningstats import RunningStats
+
+
+@pytest.fixture(scope='module')
+def data():
+    return np.random.default_rng(0).normal(1.5, 0.3, size=2000)
+
+
+def test_welford_equals_numpy(data):
+    stats = RunningStats()
+    for x in data:
+        stats.update(x)
+    assert stats.n == len(data)
+    assert stats.mean == pytest.approx(data.mean(), rel=1e-12)
+    assert stats.variance == pytest.approx(data.var(ddof=1), rel=1e-10)
+
+
+def test_welford_keeps_arrays_per_element(data):
+    rows = data.reshape(-1, 4)
+    stats = RunningStats()
+    for row in rows:
+        stats.update(row)
+    np.testing.assert_allclose(stats.mean, rows.mean(axis=0), rtol=1e-12)
+    np.testing.assert_allclose(stats.variance, rows.var(axis=0, ddof=1), rtol=1e-10)
+
+
+def test_merge_equals_single_stream(data):
+    parts = [RunningStats() for _ in range(3)]
+    for part, shard in zip(parts, np.array_split(data, [100, 1500])):
+        for x in shard:
+            part.update(x)
+    merged = parts[0].merge(parts[1]).merge(parts[2]).merge(RunningStats())
+    assert merged.n == len(data)
+    assert merged.mean == pytest.approx(data.mean(), rel=1e-12)
+    assert merged.variance == pytest.approx(data.var(ddof=1), rel=1e-10)
+
+
+def test_variance_needs_two_estimations():
+    stats = RunningStats()
+    stats.update(1.0)
+    assert np.isnan(stats.variance)
+
+
+def test_p2_sketches_are_close_to_the_quantiles(data):
+    stats = RunningStats(quantiles=(0.25, 0.5, 0.75))
+    for x in data:
+        stats.update(x)
+    for p, value in stats.quantiles().items():
+        assert value == pytest.approx(np.quantile(data, p), abs=0.02)
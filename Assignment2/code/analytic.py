@@ -0,0 +1,157 @@
+import numpy as np
+import pandas as pd
+from scipy import integrate
+
+# Squared coefficient of variation of the service times of ServerUsage. The fat
+# tail is exponential with rate 0.8 * mu with probability 0.75, else 4 * mu.
+_F_MEAN = 0.75 / 0.8 + 0.25 / 4
+_F_SECOND = 2 * (0.75 / 0.8 ** 2 + 0.25 / 4 ** 2)
+SCV = {'M': 1.0, 'D': 0.0, 'F': _F_SECOND / _F_MEAN ** 2 - 1}
+
+
+def erlang_c(num_machines, rho):
+    """
+    Probability that a customer has to wait in an M/M/c queue, with the stable
+    recursion of Erlang B over the number of servers.
+
+    :param num_machines: (C) number of counters
+    :param rho: system load, below 1
+    :return: probability of waiting
+    """
+    a = rho * num_machines
+    blocking = 1.0
+    for k in range(1, num_machines + 1):
+        blocking = a * blocking / (k + a * blocking)
+    return blocking / (1 - rho * (1 - blocking))
+
+def mmc_wait(num_machines, rho, mu):
+    """
+    Exact expected waiting time of an M/M/c queue.
+
+    :param num_machines: (C) number of counters
+    :param rho: system load, below 1
+    :param mu: service rate
+    :return: expected waiting time in the queue
+    """
+    _check(rho)
+    return erlang_c(num_machines, rho) / (num_machines * mu * (1 - rho))
+
+def mgc_wait(num_machines, rho, mu, scv):
+    """
+    Allen-Cunneen approximation of the expected waiting time of an M/G/c queue,
+    the M/M/c wait scaled by (1 + scv) / 2. Exact for c = 1 (Pollaczek-Khinchine)
+    and for exponential service.
+
+    :param scv: squared coefficient of variation of the service times
+    """
+    return (1 + scv) / 2 * mmc_wait(num_machines, rho, mu)
+
+def mdc_wait(num_machines, rho, mu):
+    """
+    Expected waiting time of an M/D/c queue, the Allen-Cunneen approximation with
+    the correction of Cosmetatos, which is exact for c = 1.
+    """
+    correction = 1 + (1 - rho) * (num_machines - 1) * (np.sqrt(4 + 5 * num_machines) - 2) / (16 * rho * num_machines)
+    return 0.5 * correction * mmc_wait(num_machines, rho, mu)
+
+def sjf_wait(rho, mu):
+    """
+    Exact expected waiting time of an M/M/1 queue which serves the shortest job
+    first, without preemption. A job of length x waits W0 / (1 - rho(x))^2, with
+    W0 the mean residual work and rho(x) the load of the jobs shorter than x.
+
+    :param rho: system load, below 1
+    :param mu: service rate
+    :return: expected waiting time in the queue
+    """
+    _check(rho)
+    lambda_ = rho * mu
+    residual = lambda_ / mu ** 2
+
+    def wait(x):
+        shorter = rho * (1 - np.exp(-mu * x) * (1 + mu * x))
+        return mu * np.exp(-mu * x) * residual / (1 - shorter) ** 2
+
+    return integrate.quad(wait, 0, np.inf)[0]
+
+def expected_wait(num_machines, rho, mu, distribution='M', method='FIFO'):
+    """
+    Expected waiting time of a configuration of setup, exact where a closed form
+    exists and approximated otherwise.
+
+    :param num_machines: (C) number of counters
+    :param rho: system load, below 1
+    :param mu: service rate
+    :param distribution: distribution of the service times, 'M', 'D' or 'F'
+    :param method: method used to determine next customer, 'FIFO', or 'prior' for one server and 'M'
+    :return: expected waiting time and whether it is exact
+    """
+    if method == 'prior':
+        if num_machines != 1 or distribution != 'M':
+            raise ValueError("Only the prior method with one server and distribution 'M' has a reference")
+        return sjf_wait(rho, mu), True
+    if method != 'FIFO':
+        raise ValueError(f"Method {method} is not supported, use 'FIFO' or 'prior'")
+
+    if distribution == 'M':
+        return mmc_wait(num_machines, rho, mu), True
+    if distribution == 'D':
+        return mdc_wait(num_machines, rho, mu), num_machines == 1
+    if distribution == 'F':
+        return mgc_wait(num_machines, rho, mu, SCV['F']), num_machines == 1
+    raise ValueError(f"Unknown distribution {distribution}, use 'M', 'D' or 'F'")
+
+def expected_table(rhos, servers=(1, 2, 4), mu=2.5, distribution='M', method='FIFO'):
+    """
+    Expected waiting times for every load and number of servers, to use in place
+    of the simulations of the rho experiment where a reference exists.
+
+    :param rhos: system loads, below 1
+    :param servers: numbers of counters
+    :return: DataFrame with Servers, Rho, ExpectedWaitingTime and Exact
+    """
+    data = [[num_machines, rho, *expected_wait(num_machines, rho, mu, distribution, method)]
+            for rho in rhos for num_machines in servers]
+    return pd.DataFrame(data, columns=['Servers', 'Rho', 'ExpectedWaitingTime', 'Exact'])
+
+def z_scores(df, mu=2.5, rho=0.9, threshold=3.0):
+    """
+    Compares the simulated cells of a DataFrame like df_variance or
+    df_comparisonDeterministic with the expected waiting times. The z-score of a
+    cell is the difference of its mean with the expectation, over the standard
+    error of the replications. Cells without a reference are left out.
+
+    :param df: DataFrame with MeanWaitingTime and Servers, and optionally Rho,
+        b_distribution and Method
+    :param mu: service rate
+    :param rho: system load of the cells when df has no Rho
+    :param threshold: absolute z-score above which a cell deviates
+    :return: DataFrame per cell with the Mean, StdError, Expected, Exact, Z and Deviates
+    """
+    df = df.copy()
+    df['Servers'] = df['Servers'].astype(str).str.extract(r'(\d+)', expand=False).astype(int)
+    defaults = {'Rho': rho, 'b_distribution': 'M', 'Method': 'FIFO'}
+    for column, value in defaults.items():
+        if column not in df:
+            df[column] = value
+
+    data = []
+    for (servers, cell_rho, distribution, method), cell in df.groupby(['Servers', 'Rho', 'b_distribution', 'Method']):
+        try:
+            expected, exact = expected_wait(servers, cell_rho, mu, distribution, method)
+        except ValueError:
+            continue
+        mean = cell['MeanWaitingTime'].mean()
+        std_error = cell['MeanWaitingTime'].std(ddof=1) / np.sqrt(len(cell))
+        # Cells at a very low load can have no waiting at all
+        with np.errstate(divide='ignore', invalid='ignore'):
+            z = (mean - expected) / std_error
+        data.append([servers, cell_rho, distribution, method, len(cell), mean, std_error, expected, exact, z,
+                     abs(z) > threshold])
+
+    return pd.DataFrame(data, columns=['Servers', 'Rho', 'b_distribution', 'Method', 'Replications', 'Mean',
+                                       'StdError', 'Expected', 'Exact', 'Z', 'Deviates'])
+
+def _check(rho):
+    if not 0 < rho < 1:
+        raise ValueError(f'The load rho should be between 0 and 1 for a steady state, got {rho}')
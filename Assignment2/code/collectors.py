@@ -0,0 +1,96 @@
+import numpy as np
+
+
+class WaitingTimes(object):
+    '''Collector that keeps every waiting time, like the old waiting_times list'''
+    def __init__(self):
+        self.values = []
+
+    def add(self, waiting_time):
+        """Method to collect the waiting time of a customer"""
+        self.values.append(waiting_time)
+
+    @property
+    def count(self):
+        return len(self.values)
+
+    @property
+    def mean(self):
+        return np.mean(self.values) if self.values else np.nan
+
+    @property
+    def variance(self):
+        return np.var(self.values, ddof=1) if len(self.values) > 1 else np.nan
+
+    def quantile(self, p):
+        """Method to give the p quantile of the waiting times"""
+        return np.quantile(self.values, p) if self.values else np.nan
+
+
+class RunningStats(object):
+    '''Collector that keeps the mean and variance with the algorithm of Welford, in constant memory'''
+    def __init__(self):
+        self.count = 0
+        self.mean = np.nan
+        self._M2 = 0.0
+
+    def add(self, waiting_time):
+        """Method to collect the waiting time of a customer"""
+        self.count += 1
+        if self.count == 1:
+            self.mean = waiting_time
+            return
+        delta = waiting_time - self.mean
+        self.mean += delta / self.count
+        self._M2 += delta * (waiting_time - self.mean)
+
+    @property
+    def variance(self):
+        return self._M2 / (self.count - 1) if self.count > 1 else np.nan
+
+
+class Histogram(RunningStats):
+    '''
+    Collector that counts the waiting times in fixed bins, besides the mean and
+    variance, so the quantiles can be estimated in constant memory
+    '''
+    def __init__(self, bin_width=0.01, max_value=100):
+        '''
+        :param bin_width: width of the bins
+        :param max_value: upper edge of the last bin, longer waits are counted as overflow
+        '''
+        super().__init__()
+        self.bin_width = bin_width
+        self.counts = np.zeros(int(np.ceil(max_value / bin_width)), dtype=np.int64)
+        self.overflow = 0
+
+    def add(self, waiting_time):
+        """Method to collect the waiting time of a customer"""
+        super().add(waiting_time)
+        i = int(waiting_time / self.bin_width)
+        if i < len(self.counts):
+            self.counts[i] += 1
+        else:
+            self.overflow += 1
+
+    @property
+    def edges(self):
+        return np.arange(len(self.counts) + 1) * self.bin_width
+
+    def quantile(self, p):
+        """
+        Method to estimate the p quantile of the waiting times, interpolating
+        within the bin. Quantiles in the overflow are given as np.inf.
+        """
+        if self.count == 0:
+            return np.nan
+        rank = p * self.count
+        cumulative = np.cumsum(self.counts)
+        i = np.searchsorted(cumulative, rank)
+        # Leading empty bins only match the 0 quantile
+        while i < len(self.counts) and self.counts[i] == 0:
+            i += 1
+        if i == len(self.counts):
+            return np.inf
+        below = cumulative[i] - self.counts[i]
+        return (i + (rank - below) / self.counts[i]) * self.bin_width
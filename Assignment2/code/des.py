@@ -0,0 +1,157 @@
+import random
+import simpy
+from scipy.stats import shapiro
+
+from collectors import WaitingTimes
+
+# Based on https://simpy.readthedocs.io/en/latest/examples/carwash.html
+
+class ServerUsage(object):
+    '''Object that represents the server'''
+    def __init__(self, env, num_machines, mu, method, collector=None, service_random=None):
+        '''
+        :param env: simpy environment
+        :param num_machines: (C) number of counters
+        :param mu: service method value
+        :param method: method used to determine next customer
+        :param collector: collector of the waiting times, see collectors.py,
+            a new WaitingTimes when None
+        :param service_random: random.Random of the service times, the random module when None
+        '''
+        self.env = env
+        self.mu = mu
+        self.collector = WaitingTimes() if collector is None else collector
+        self.random = random if service_random is None else service_random
+        if method == 'FIFO':
+            # print("FIFO")
+            self.machines = simpy.Resource(env, num_machines)
+        elif method == 'prior':
+            # print("PRIOR")
+            self.machines = simpy.PriorityResource(env, num_machines)
+
+    def service(self, customer):
+        """Method to service a customer"""
+        yield self.env.timeout(self.random.expovariate(self.mu))
+        # print(f'Customer {customer} has been helped')
+
+    def priorService(self, job_length, customer):
+        """Method for priority service"""
+        yield self.env.timeout(job_length)
+
+    def det_service(self, customer):
+        """Method for deterministic service"""
+        yield self.env.timeout(1/self.mu)
+
+    def fat_tail_service(self, customer):
+        """Method for fat-tail service"""
+        if self.random.random() > 0.25:
+            _ = self.mu*0.8
+        else:
+            _ = self.mu*4
+
+        yield self.env.timeout(self.random.expovariate(_))
+
+def customer(env, name, Server, distribution):
+    """Function for creating a customer
+
+    :param env: Simpy environment
+    :param name: name of the customer (iterator)
+    :param Server: Simpy server
+    :param distribution: Distribution for the service time
+    """
+
+    arrive = env.now
+    # print(f'Customer {name} arrives at {arrive}')
+
+    with Server.machines.request() as request:
+
+        yield request
+
+        # Save waiting times
+        waiting_time = env.now - arrive
+        Server.collector.add(waiting_time)
+
+        if distribution == 'D':
+            yield env.process(Server.det_service(name))
+        elif distribution == 'F':
+            yield env.process(Server.fat_tail_service(name))
+        elif distribution == 'M':
+            yield env.process(Server.service(name))
+
+        # print(f"Customer {name} leaves service at {env.now}")
+
+def prior_customer(env, name, Server, job_length):
+    """
+    Customer that follows the priority rules. Same
+    parameters as the normal customer
+    """
+
+    arrive = env.now
+    # print(f'Customer {name} arrives at {arrive}')
+
+    with Server.machines.request(priority=job_length) as request:
+
+        yield request
+
+        # Save waiting times
+        waiting_time = env.now - arrive
+        Server.collector.add(waiting_time)
+
+        yield env.process(Server.priorService(job_length, name))
+
+        # print(f"Customer {name} leaves service at {env.now}")
+
+
+def setup(env, num_machines, rho, mu, number_of_customers, method='FIFO', distribution='M', collector=None,
+          arrival_random=None, service_random=None):
+
+    """
+    Method for setting up the environment. The waiting times are collected in
+    collector, which is read after env.run()
+
+    For common random numbers give separately seeded random.Random streams for
+    the arrivals and the services: the i-th customer then gets the same arrival
+    and service time under FIFO and prior, and for every number of servers.
+    """
+
+    ServerEnv = ServerUsage(env, num_machines, mu, method, collector, service_random)
+    arrival_random = random if arrival_random is None else arrival_random
+    lambda_ = rho * (mu * num_machines)
+
+    # i = 0
+    # env.process(customer(env, i, ServerEnv))
+    # while True:
+    #     yield env.timeout(random.expovariate(lambda_))
+    #     i += 1
+    #     env.process(customer(env, i, ServerEnv))
+
+    if method == 'prior':
+        if distribution != 'M':
+            for i in range(number_of_customers):
+                yield env.timeout(arrival_random.expovariate(lambda_))
+
+                job_length = mu
+                env.process(prior_customer(env, i, ServerEnv, job_length))
+
+        else:
+            for i in range(number_of_customers):
+                yield env.timeout(arrival_random.expovariate(lambda_))
+
+                job_length = ServerEnv.random.expovariate(ServerEnv.mu)
+                env.process(prior_customer(env, i, ServerEnv, job_length))
+
+    elif method == "FIFO":
+        if distribution != 'M':
+            for i in range(number_of_customers):
+                yield env.timeout(arrival_random.expovariate(lambda_))
+
+                env.process(customer(env, i, ServerEnv, distribution))
+        else:
+            for i in range(number_of_customers):
+                yield env.timeout(arrival_random.expovariate(lambda_))
+                env.process(customer(env, i, ServerEnv, distribution))
+
+def checkShapiro(df):
+    value = shapiro(df['MeanWaitingTime'])
+    print(value)
+    return value
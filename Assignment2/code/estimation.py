@@ -0,0 +1,172 @@
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+import fastqueue
+
+
+def mser5(waits):
+    """
+    Warm-up truncation with the MSER-5 rule. The waits are averaged in batches of
+    5, and the number of batches d which minimizes the standard error of the mean
+    of the remaining batches, sum (Y_i - mean)^2 / (n - d)^2, is cut off. Only the
+    first half is considered, as the rule is unstable at the end of a run.
+
+    :param waits: waiting times in order of arrival
+    :return: number of customers to discard
+    """
+    n = len(waits) // 5
+    if n < 2:
+        return 0
+    batches = np.asarray(waits[:5 * n], dtype=float).reshape(n, 5).mean(axis=1)
+
+    # Sums over the batches after d, for every d at once
+    sums = np.cumsum(batches[::-1])[::-1]
+    squares = np.cumsum(batches[::-1] ** 2)[::-1]
+    remaining = n - np.arange(n)
+    mser = (squares - sums ** 2 / remaining) / remaining ** 2
+
+    return 5 * int(np.argmin(mser[:n // 2 + 1]))
+
+def batch_means(waits, batches=20, confidence=0.95):
+    """
+    Mean of a single run with the confidence interval of the batch means method:
+    the run is split in batches, whose means are close to independent when the
+    batches are long enough.
+
+    :param waits: waiting times after the warm-up
+    :param batches: number of batches
+    :param confidence: confidence level of the interval
+    :return: mean and half-width of the confidence interval
+    """
+    size = len(waits) // batches
+    means = np.asarray(waits[:size * batches], dtype=float).reshape(batches, size).mean(axis=1)
+    half_width = stats.t.ppf((1 + confidence) / 2, batches - 1) * means.std(ddof=1) / np.sqrt(batches)
+    return means.mean(), half_width
+
+def _seed_sequence(seed):
+    return seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+
+def _met(mean, half_width, target, relative):
+    return half_width <= (target * abs(mean) if relative else target)
+
+def sequential_replications(num_machines, rho, mu, target, number_of_customers=5000, method='FIFO', distribution='M',
+                            relative=False, confidence=0.95, min_replications=5, max_replications=1000, seed=None):
+    """
+    Adds replications until the confidence interval of the mean waiting time is
+    as narrow as the target. The estimate is the mean over the truncated
+    replication means. The warm-up is found with MSER-5 on the average over the
+    first min_replications replications and cut off of all of them: truncating
+    every replication at its own MSER-5 point biases the mean down, as the rule
+    prefers cutting right before a quiet stretch.
+
+    :param num_machines: (C) number of counters
+    :param rho: system load
+    :param mu: service rate
+    :param target: wanted half-width of the confidence interval
+    :param number_of_customers: number of arriving customers per replication
+    :param method: method used to determine next customer, 'FIFO' or 'prior'
+    :param distribution: distribution of the service times, 'M', 'D' or 'F'
+    :param relative: the target is relative to the mean
+    :param confidence: confidence level of the interval
+    :param min_replications: replications before the first check
+    :param max_replications: replications after which it stops, also without the target
+    :param seed: seed of the cell
+    :return: dict with the Mean, HalfWidth, Replications, Customers (simulated in total),
+        Truncated (customers cut off every replication) and TargetMet
+    """
+    min_replications = max(2, min(min_replications, max_replications))
+    seeds = _seed_sequence(seed).spawn(max_replications)
+
+    pilot = np.array([fastqueue.simulate(num_machines, rho, mu, number_of_customers, method, distribution, s)
+                      for s in seeds[:min_replications]])
+    cut = mser5(pilot.mean(axis=0))
+    means = list(pilot[:, cut:].mean(axis=1))
+
+    while True:
+        mean = np.mean(means)
+        half_width = stats.t.ppf((1 + confidence) / 2, len(means) - 1) * np.std(means, ddof=1) / np.sqrt(len(means))
+        if _met(mean, half_width, target, relative) or len(means) == max_replications:
+            break
+
+        waits = fastqueue.simulate(num_machines, rho, mu, number_of_customers, method, distribution,
+                                   seeds[len(means)])
+        means.append(waits[cut:].mean())
+
+    return {'Mean': mean, 'HalfWidth': half_width, 'Replications': len(means),
+            'Customers': len(means) * number_of_customers, 'Truncated': cut,
+            'TargetMet': _met(mean, half_width, target, relative)}
+
+def sequential_run(num_machines, rho, mu, target, number_of_customers=5000, method='FIFO', distribution='M',
+                   relative=False, confidence=0.95, batches=20, max_customers=10**7, seed=None):
+    """
+    Doubles the length of a single run until the batch means confidence interval
+    of the mean waiting time is as narrow as the target. The run is continued
+    from where it stopped, with the same random stream, so the first customers
+    are never simulated again. FIFO runs carry the times at which the servers are
+    free over; with priorities a later short job can still overtake a waiting
+    customer, so their waits are recomputed over the whole, extended, path. The
+    warm-up is cut off with MSER-5 before the batches are made.
+
+    :param number_of_customers: length of the first part of the run
+    :param batches: number of batches
+    :param max_customers: length after which it stops, also without the target
+    :return: dict with the Mean, HalfWidth, Replications (1), Customers (simulated
+        in total), Truncated (customers cut off) and TargetMet
+    """
+    if method not in ('FIFO', 'prior'):
+        raise ValueError(f"Method {method} is not supported, use 'FIFO' or 'prior'")
+
+    # Same draws as fastqueue.simulate, so the first part equals simulate with the seed
+    rng = np.random.default_rng(seed)
+    lambda_ = rho * (mu * num_machines)
+    arrivals, job_lengths, waits = np.empty(0), np.empty(0), np.empty(0)
+    free = [0.0] * num_machines
+
+    while True:
+        last = arrivals[-1] if len(arrivals) else 0.0
+        new = last + np.cumsum(rng.exponential(1 / lambda_, size=number_of_customers))
+        arrivals = np.concatenate((arrivals, new))
+        if method == 'prior':
+            if distribution == 'M':
+                lengths = rng.exponential(1 / mu, size=number_of_customers)
+            else:
+                lengths = np.full(number_of_customers, float(mu))
+            job_lengths = np.concatenate((job_lengths, lengths))
+            waits = fastqueue.priority_waiting_times(arrivals, job_lengths, num_machines)
+        else:
+            services = fastqueue.service_times(rng, number_of_customers, mu, distribution)
+            waits = np.concatenate((waits, fastqueue.fifo_waiting_times(new, services, num_machines, free)))
+
+        cut = mser5(waits)
+        mean, half_width = batch_means(waits[cut:], batches, confidence)
+        if _met(mean, half_width, target, relative) or 2 * len(waits) > max_customers:
+            break
+        # Adds as many customers as there are, which doubles the run
+        number_of_customers = len(waits)
+
+    return {'Mean': mean, 'HalfWidth': half_width, 'Replications': 1, 'Customers': len(waits),
+            'Truncated': cut, 'TargetMet': _met(mean, half_width, target, relative)}
+
+def precision_table(target, servers=(1, 2, 4), rhos=(0.9,), methods=('FIFO',), distributions=('M',), mu=2.5,
+                    mode='replications', seed=None, **kwargs):
+    """
+    Estimates the mean waiting time of every cell of a grid to the target
+    precision, and reports the precision achieved per cell.
+
+    :param target: wanted half-width of the confidence intervals
+    :param mode: 'replications' for sequential_replications, 'batch' for sequential_run
+    :param seed: seed of the grid, every cell gets its own stream
+    :param kwargs: passed on to sequential_replications or sequential_run
+    :return: DataFrame with Servers, Rho, Method and b_distribution and the results per cell
+    """
+    estimator = {'replications': sequential_replications, 'batch': sequential_run}[mode]
+    cells = [(rho, method, num_machines, distribution) for rho in rhos for method in methods
+             for num_machines in servers for distribution in distributions]
+
+    data = []
+    for (rho, method, num_machines, distribution), cell_seed in zip(cells, _seed_sequence(seed).spawn(len(cells))):
+        result = estimator(num_machines, rho, mu, target, method=method, distribution=distribution,
+                           seed=cell_seed, **kwargs)
+        data.append({'Servers': num_machines, 'Rho': rho, 'Method': method, 'b_distribution': distribution, **result})
+    return pd.DataFrame(data)
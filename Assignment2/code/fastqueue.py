@@ -0,0 +1,313 @@
+import heapq
+import numpy as np
+import pandas as pd
+
+
+def service_times(rng, n, mu, distribution='M'):
+    """
+    Draws the service times of n customers, with the same distributions as ServerUsage.
+
+    :param rng: numpy random Generator
+    :param n: number of customers, or a (replications, customers) shape
+    :param mu: service rate
+    :param distribution: 'M' exponential, 'D' deterministic or 'F' the fat-tailed
+        hyperexponential (rate 0.8 * mu with probability 0.75, else 4 * mu)
+    """
+    if distribution == 'M':
+        return rng.exponential(1 / mu, size=n)
+    elif distribution == 'D':
+        return np.full(n, 1 / mu)
+    elif distribution == 'F':
+        rates = np.where(rng.random(n) > 0.25, mu * 0.8, mu * 4)
+        return rng.exponential(1, size=n) / rates
+    raise ValueError(f"Unknown distribution {distribution}, use 'M', 'D' or 'F'")
+
+def fifo_waiting_times(arrivals, services, num_machines, free=None):
+    """
+    Waiting times of FIFO customers from their arrival and service times, with the
+    Kiefer-Wolfowitz recursion over the times at which the servers are free again.
+    A single server reduces to the Lindley recursion, which is solved at once.
+
+    Both can be 2-D (replications, customers) arrays, the replications are then
+    advanced together, one customer at a time.
+
+    :param arrivals: arrival times, in increasing order
+    :param services: service times
+    :param num_machines: (C) number of counters
+    :param free: heap of the times at which the servers are free before the first
+        arrival, updated in place, to continue a run in chunks. Only for 1-D arrays.
+    """
+    arrivals = np.asarray(arrivals, dtype=float)
+    services = np.asarray(services, dtype=float)
+
+    if num_machines == 1:
+        # W_n = max(0, W_n-1 + S_n-1 - T_n) is a running maximum of a random walk
+        steps = services[..., :-1] - np.diff(arrivals, axis=-1)
+        walk = np.concatenate((np.zeros(steps.shape[:-1] + (1,)), np.cumsum(steps, axis=-1)), axis=-1)
+        waits = walk - np.minimum.accumulate(walk, axis=-1)
+        if free is not None and len(arrivals):
+            # The wait of the first customer carries over the walk
+            waits = np.maximum(waits, max(0.0, free[0] - arrivals[0]) + walk)
+            free[0] = arrivals[-1] + waits[-1] + services[-1]
+        return waits
+
+    if arrivals.ndim == 2:
+        # Times at which the servers of every replication are free
+        free = np.zeros((len(arrivals), num_machines))
+        rows = np.arange(len(arrivals))
+        waits = np.empty(arrivals.shape)
+        for i in range(arrivals.shape[1]):
+            server = free.argmin(axis=1)
+            start = np.maximum(free[rows, server], arrivals[:, i])
+            waits[:, i] = start - arrivals[:, i]
+            free[rows, server] = start + services[:, i]
+        return waits
+
+    # Heap of the times at which the servers are free, the earliest serves next
+    free = [0.0] * num_machines if free is None else free
+    waits = np.empty(len(arrivals))
+    for i, (arrive, service) in enumerate(zip(arrivals.tolist(), services.tolist())):
+        start = max(free[0], arrive)
+        waits[i] = start - arrive
+        heapq.heapreplace(free, start + service)
+
+    return waits
+
+def priority_waiting_times(arrivals, job_lengths, num_machines):
+    """
+    Waiting times of customers with non-preemptive priorities, like prior_customer
+    with a PriorityResource. A free server takes the waiting customer with the
+    shortest job, ties go to the earliest arrival, and the job length is the
+    service time. Runs over a heap of the waiting customers and a heap of the
+    times at which the servers are free, without any simpy events.
+
+    :param arrivals: arrival times, in increasing order
+    :param job_lengths: job lengths, the priority and service time of the customers
+    :param num_machines: (C) number of counters
+    :return: waiting times of the customers, in order of arrival
+    """
+    arrivals = np.asarray(arrivals, dtype=float).tolist()
+    job_lengths = np.asarray(job_lengths, dtype=float).tolist()
+    n = len(arrivals)
+
+    free = [0.0] * num_machines
+    waiting = []
+    waits = np.empty(n)
+    i = 0
+    while i < n or waiting:
+        if i < n and (not waiting or arrivals[i] < free[0]):
+            # Next event is an arrival, which is served at once by a free server
+            if free[0] <= arrivals[i]:
+                waits[i] = 0.0
+                heapq.heapreplace(free, arrivals[i] + job_lengths[i])
+            else:
+                heapq.heappush(waiting, (job_lengths[i], arrivals[i], i))
+            i += 1
+        else:
+            # Next event is a server becoming free, it takes the shortest waiting job
+            job_length, arrive, j = heapq.heappop(waiting)
+            start = free[0]
+            waits[j] = start - arrive
+            heapq.heapreplace(free, start + job_length)
+
+    return waits
+
+def simulate(num_machines, rho, mu, number_of_customers, method='FIFO', distribution='M', seed=None):
+    """
+    Fast alternative to running setup in a simpy environment. Draws all arrival and
+    service times at once and computes the waiting times from them, with the same
+    parameters as setup.
+
+    :param num_machines: (C) number of counters
+    :param rho: system load
+    :param mu: service rate
+    :param number_of_customers: number of arriving customers
+    :param method: method used to determine next customer, 'FIFO' or 'prior'
+    :param distribution: distribution of the service times, 'M', 'D' or 'F'
+    :param seed: seed or numpy random Generator
+    :return: waiting times of the customers, in order of arrival
+    """
+    if method not in ('FIFO', 'prior'):
+        raise ValueError(f"Method {method} is not supported, use 'FIFO' or 'prior'")
+
+    rng = np.random.default_rng(seed)
+    lambda_ = rho * (mu * num_machines)
+
+    arrivals = np.cumsum(rng.exponential(1 / lambda_, size=number_of_customers))
+    if method == 'prior':
+        # Same job lengths as setup, which uses mu itself for the other distributions
+        if distribution == 'M':
+            job_lengths = rng.exponential(1 / mu, size=number_of_customers)
+        else:
+            job_lengths = np.full(number_of_customers, float(mu))
+        return priority_waiting_times(arrivals, job_lengths, num_machines)
+
+    services = service_times(rng, number_of_customers, mu, distribution)
+    return fifo_waiting_times(arrivals, services, num_machines)
+
+def simulate_batch(num_machines, rho, mu, number_of_customers, replications, distribution='M', seed=None):
+    """
+    Simulates many independent FIFO replications at once. The arrival and service
+    times are drawn in bulk as (replications, customers) arrays.
+
+    :param num_machines: (C) number of counters
+    :param rho: system load, or an array of loads with one load per replication
+    :param mu: service rate
+    :param number_of_customers: number of arriving customers per replication
+    :param replications: number of replications, per load when rho is an array
+    :param distribution: distribution of the service times, 'M', 'D' or 'F'
+    :param seed: seed or numpy random Generator
+    :return: waiting times, a (replications, customers) array
+    """
+    rng = np.random.default_rng(seed)
+    lambda_ = np.repeat(np.atleast_1d(rho), replications) * (mu * num_machines)
+    shape = (len(lambda_), number_of_customers)
+
+    arrivals = np.cumsum(rng.exponential(1, size=shape), axis=1) / lambda_[:, None]
+    services = service_times(rng, shape, mu, distribution)
+    return fifo_waiting_times(arrivals, services, num_machines)
+
+def rho_sweep(rhos, servers, mu, number_of_customers, replications, distribution='M', seed=None):
+    """
+    Mean waiting time per replication for every load and number of servers, the
+    same table as the rho experiment of the notebook (df_variance).
+
+    :param rhos: system loads
+    :param servers: numbers of counters
+    :param mu: service rate
+    :param number_of_customers: number of arriving customers per replication
+    :param replications: number of replications per load and number of servers
+    :param distribution: distribution of the service times, 'M', 'D' or 'F'
+    :param seed: seed or numpy random Generator
+    :return: DataFrame with MeanWaitingTime, CustomerCount, Servers and Rho
+    """
+    rng = np.random.default_rng(seed)
+    rhos = np.asarray(rhos, dtype=float)
+
+    # All loads of one number of servers are simulated together
+    means = {}
+    for j in servers:
+        waits = simulate_batch(j, rhos, mu, number_of_customers, replications, distribution, rng)
+        means[j] = waits.mean(axis=1).reshape(len(rhos), replications)
+
+    # Rows ordered by load, then servers, then replication, like the notebook
+    data = [[means[j][z, i], number_of_customers, j, rhos[z]]
+            for z in range(len(rhos)) for j in servers for i in range(replications)]
+    return pd.DataFrame(data, columns=['MeanWaitingTime', 'CustomerCount', 'Servers', 'Rho'])
+
+def random_numbers(number_of_customers, seed=None, antithetic=False):
+    """
+    Uniform random numbers of a replication, from separate seeded streams for the
+    arrivals and the services, so compared policies can use common random numbers.
+    Customer i gets the same numbers under every policy and number of servers.
+
+    :param number_of_customers: number of arriving customers
+    :param seed: seed or SeedSequence of the replication
+    :param antithetic: use 1 - U instead of U, the antithetic of the same seed
+    :return: dict with the uniforms of the 'arrival', 'service' and 'mixture' draws
+    """
+    if not isinstance(seed, np.random.SeedSequence):
+        seed = np.random.SeedSequence(seed)
+    # Children derived without spawn, so the same seed always gives the same streams
+    arrival, service = (np.random.default_rng(np.random.SeedSequence(seed.entropy, spawn_key=seed.spawn_key + (i,)))
+                        for i in range(2))
+    uniforms = {'arrival': arrival.random(number_of_customers),
+                'service': service.random(number_of_customers),
+                'mixture': service.random(number_of_customers)}
+    if antithetic:
+        uniforms = {name: 1 - u for name, u in uniforms.items()}
+    return uniforms
+
+def simulate_uniforms(uniforms, num_machines, rho, mu, method='FIFO', distribution='M'):
+    """
+    Simulates a replication from given uniforms by inversion, with the same
+    distributions and job lengths as simulate.
+
+    :param uniforms: uniforms as given by random_numbers
+    :return: waiting times of the customers, in order of arrival
+    """
+    lambda_ = rho * (mu * num_machines)
+    # Inversion of the exponential distribution, clipped so 1 - U is never 0
+    exponential = {name: -np.log1p(-np.minimum(u, np.nextafter(1, 0))) for name, u in uniforms.items()}
+    n = len(exponential['arrival'])
+
+    arrivals = np.cumsum(exponential['arrival']) / lambda_
+    if distribution == 'D':
+        services = np.full(n, 1 / mu)
+    elif distribution == 'F':
+        services = exponential['service'] / np.where(uniforms['mixture'] > 0.25, mu * 0.8, mu * 4)
+    else:
+        services = exponential['service'] / mu
+
+    if method == 'prior':
+        job_lengths = services if distribution == 'M' else np.full(n, float(mu))
+        return priority_waiting_times(arrivals, job_lengths, num_machines)
+    return fifo_waiting_times(arrivals, services, num_machines)
+
+def compare_configurations(configurations, mu, number_of_customers, replications, distribution='M', seed=None,
+                           common=True):
+    """
+    Simulates several (servers, rho, method) configurations with common random
+    numbers: replication r of every configuration uses the same uniforms. The
+    differences are then best tested paired, for example with a Wilcoxon test.
+
+    The variance ratio of a pair of configurations is (Var A + Var B) / Var(A - B),
+    the variance of the difference with independent streams over the variance
+    achieved, which is how many times fewer replications the comparison needs.
+
+    :param configurations: list of (servers, rho, method)
+    :param mu: service rate
+    :param number_of_customers: number of arriving customers per replication
+    :param replications: number of replications per configuration
+    :param distribution: distribution of the service times, 'M', 'D' or 'F'
+    :param seed: seed of the experiment
+    :param common: False gives every configuration independent streams, for reference
+    :return: DataFrame of the mean waiting times, with MeanWaitingTime, CustomerCount,
+        Servers, Rho, Method and Replication, and DataFrame with the variance ratio of
+        every pair of configurations
+    """
+    seeds = np.random.SeedSequence(seed).spawn(replications * (1 if common else len(configurations)))
+
+    means = np.empty((len(configurations), replications))
+    data = []
+    for r in range(replications):
+        uniforms = random_numbers(number_of_customers, seeds[r]) if common else None
+        for k, (num_machines, rho, method) in enumerate(configurations):
+            if not common:
+                uniforms = random_numbers(number_of_customers, seeds[k * replications + r])
+            means[k, r] = simulate_uniforms(uniforms, num_machines, rho, mu, method, distribution).mean()
+            data.append([means[k, r], number_of_customers, num_machines, rho, method, r])
+
+    df = pd.DataFrame(data, columns=['MeanWaitingTime', 'CustomerCount', 'Servers', 'Rho', 'Method', 'Replication'])
+
+    ratios = []
+    for a in range(len(configurations)):
+        for b in range(a + 1, len(configurations)):
+            independent = np.var(means[a], ddof=1) + np.var(means[b], ddof=1)
+            ratios.append([configurations[a], configurations[b], independent / np.var(means[a] - means[b], ddof=1)])
+    return df, pd.DataFrame(ratios, columns=['A', 'B', 'VarianceRatio'])
+
+def antithetic_replications(num_machines, rho, mu, number_of_customers, pairs, method='FIFO', distribution='M',
+                            seed=None):
+    """
+    Simulates pairs of antithetic replications, the second of a pair uses 1 - U
+    for every uniform of the first. The estimate is the mean over the pair means.
+
+    The variance ratio is Var(X) / (2 Var(pair mean)), the variance of the mean of
+    two independent replications over the variance achieved by a pair.
+
+    :param pairs: number of antithetic pairs, so 2 * pairs replications
+    :return: DataFrame of the mean waiting times, with MeanWaitingTime, CustomerCount,
+        Servers, Rho, Method, Pair and Antithetic, and the variance ratio
+    """
+    data = []
+    for pair, pair_seed in enumerate(np.random.SeedSequence(seed).spawn(pairs)):
+        for antithetic in (False, True):
+            uniforms = random_numbers(number_of_customers, pair_seed, antithetic)
+            mean = simulate_uniforms(uniforms, num_machines, rho, mu, method, distribution).mean()
+            data.append([mean, number_of_customers, num_machines, rho, method, pair, antithetic])
+
+    df = pd.DataFrame(data, columns=['MeanWaitingTime', 'CustomerCount', 'Servers', 'Rho', 'Method', 'Pair',
+                                     'Antithetic'])
+    pair_means = df.groupby('Pair')['MeanWaitingTime'].mean()
+    return df, np.var(df['MeanWaitingTime'], ddof=1) / (2 * np.var(pair_means, ddof=1))
@@ -0,0 +1,180 @@
+"""
+Runs the experiments of the notebook as a grid over servers, rho, distribution
+and method, with the replications of every cell fanned out to a process pool.
+
+Every replication gets its own seed, derived from the seed of the run, the cell
+and the replication number, so a replication gives the same result in any order,
+on any number of workers and after a restart. Results are appended to the csv as
+they finish, together with the parameters of the run, and replications which are
+already in the csv with the same parameters are skipped, so a killed run
+continues where it stopped:
+
+    python grid.py ../output/data/grid.csv --rhos 0.5 0.9 --distributions M D F --methods FIFO prior
+"""
+import argparse
+import csv
+import hashlib
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import product
+
+import numpy as np
+import pandas as pd
+import simpy
+from tqdm import tqdm
+
+import des
+import fastqueue
+from collectors import RunningStats
+
+COLUMNS = ['MeanWaitingTime', 'CustomerCount', 'Servers', 'Rho', 'Method', 'b_distribution', 'Replication', 'Seed',
+           'Mu', 'Engine', 'RunSeed']
+
+
+def _task(num_machines, rho, method, distribution, replication, mu, number_of_customers, engine, run_seed):
+    """
+    Task with plain Python values, so numpy scalars and their Python equals give
+    the same seed and the same key in the csv.
+    """
+    return (int(num_machines), float(rho), str(method), str(distribution), int(replication), float(mu),
+            int(number_of_customers), str(engine), int(run_seed))
+
+def task_seed(seed, cell, replication):
+    """
+    Seed of a replication, which only depends on the seed of the run, the cell and
+    the replication number.
+
+    :param seed: seed of the run
+    :param cell: (servers, rho, method, distribution)
+    :param replication: number of the replication in the cell
+    :return: 32 bit seed, usable by random.seed and numpy
+    """
+    num_machines, rho, method, distribution = cell
+    cell = (int(num_machines), float(rho), str(method), str(distribution))
+    cell_key = int.from_bytes(hashlib.sha256(repr(cell).encode()).digest()[:8], 'little')
+    return int(np.random.SeedSequence([int(seed), cell_key, int(replication)]).generate_state(1)[0])
+
+def run_replication(task):
+    """
+    Runs a single replication of a cell.
+
+    :param task: (servers, rho, method, distribution, replication, mu,
+        number_of_customers, engine, seed of the run)
+    :return: row with the values of COLUMNS
+    """
+    num_machines, rho, method, distribution, replication, mu, number_of_customers, engine, run_seed = _task(*task)
+    seed = task_seed(run_seed, (num_machines, rho, method, distribution), replication)
+
+    if engine == 'fast':
+        waits = fastqueue.simulate(num_machines, rho, mu, number_of_customers, method, distribution, seed)
+        mean, count = waits.mean(), len(waits)
+    else:
+        random.seed(seed)
+        collector = RunningStats()
+        env = simpy.Environment()
+        env.process(des.setup(env, num_machines, rho, mu, number_of_customers, method, distribution, collector))
+        env.run()
+        mean, count = collector.mean, collector.count
+
+    return [mean, count, num_machines, rho, method, distribution, replication, seed, mu, engine, run_seed]
+
+def _finished(path):
+    """
+    Reads the replications which are already in the csv. A last line which was cut
+    off by a killed run is removed.
+
+    :param path: path of the csv
+    :return: set of (servers, rho, method, distribution, replication, mu,
+        number_of_customers, engine, seed of the run)
+    """
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return set()
+
+    with open(path) as infile:
+        text = infile.read()
+    if not text.endswith('\n'):
+        with open(path, 'w') as outfile:
+            outfile.write(text[:text.rfind('\n') + 1])
+
+    with open(path, newline='') as infile:
+        reader = csv.reader(infile)
+        header = next(reader, None)
+        if header is None:
+            return set()
+        if header != COLUMNS:
+            raise ValueError(f'{path} has the columns {header}, expected {COLUMNS}')
+        return {_task(row[2], row[3], row[4], row[5], row[6], row[8], row[1], row[9], row[10]) for row in reader}
+
+def run_grid(path, servers=(1, 2, 4), rhos=(0.9,), distributions=('M',), methods=('FIFO',), replications=500,
+             mu=2.5, number_of_customers=5000, seed=0, workers=None, engine='simpy'):
+    """
+    Runs every replication of every cell of the grid which is not in the csv yet
+    with the same mu, number of customers, engine and seed, and appends the
+    results to the csv as they finish.
+
+    :param path: path of the csv, created when it does not exist
+    :param servers: numbers of counters
+    :param rhos: system loads
+    :param distributions: distributions of the service times, 'M', 'D' or 'F'
+    :param methods: methods used to determine next customer, 'FIFO' or 'prior'
+    :param replications: number of replications per cell
+    :param mu: service rate
+    :param number_of_customers: number of arriving customers per replication
+    :param seed: seed of the run
+    :param workers: number of processes, the number of cpus when None, 1 runs in this process
+    :param engine: 'simpy' for the model of des.py, 'fast' for fastqueue.simulate
+    :return: DataFrame with all rows of the csv
+    """
+    finished = _finished(path)
+    tasks = []
+    for rho, method, num_machines, distribution in product(rhos, methods, servers, distributions):
+        for replication in range(replications):
+            task = _task(num_machines, rho, method, distribution, replication, mu, number_of_customers, engine, seed)
+            if task not in finished:
+                tasks.append(task)
+
+    new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+    with open(path, 'a', newline='') as outfile:
+        writer = csv.writer(outfile)
+        if new_file:
+            writer.writerow(COLUMNS)
+
+        if workers == 1:
+            for row in tqdm(map(run_replication, tasks), total=len(tasks)):
+                writer.writerow(row)
+                outfile.flush()
+        else:
+            with ProcessPoolExecutor(workers) as pool:
+                futures = [pool.submit(run_replication, task) for task in tasks]
+                try:
+                    for future in tqdm(as_completed(futures), total=len(tasks)):
+                        writer.writerow(future.result())
+                        outfile.flush()
+                finally:
+                    for future in futures:
+                        future.cancel()
+
+    return pd.read_csv(path)
+
+def main():
+    parser = argparse.ArgumentParser(description='Runs the Assignment 2 experiments as a grid')
+    parser.add_argument('path', help='csv to append the results to')
+    parser.add_argument('--servers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--rhos', type=float, nargs='+', default=[0.9])
+    parser.add_argument('--distributions', nargs='+', default=['M'])
+    parser.add_argument('--methods', nargs='+', default=['FIFO'])
+    parser.add_argument('--replications', type=int, default=500)
+    parser.add_argument('--mu', type=float, default=2.5)
+    parser.add_argument('--customers', type=int, default=5000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--engine', choices=['simpy', 'fast'], default='simpy')
+    args = parser.parse_args()
+
+    run_grid(args.path, args.servers, args.rhos, args.distributions, args.methods, args.replications,
+             args.mu, args.customers, args.seed, args.workers, args.engine)
+
+
+if __name__ == '__main__':
+    main()
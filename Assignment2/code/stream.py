@@ -0,0 +1,133 @@
+import glob
+import os
+
+import numpy as np
+import pandas as pd
+
+from fastqueue import fifo_waiting_times, service_times
+
+COLUMNS = ['Window', 'Start', 'Arrivals', 'MeanWaitingTime', 'QueueLength', 'Utilisation']
+
+
+def _areas(starts, ends, edges):
+    """
+    Integral of the number of intervals [start, end) that cover t, over every
+    window between the edges. The integral up to t is the sum of
+    max(0, t - start) - max(0, t - end), from sorted starts and ends.
+
+    :param starts: starts of the intervals, after edges[0]
+    :param ends: ends of the intervals
+    :param edges: edges of the windows, in increasing order
+    :return: integral per window
+    """
+    def integral(points):
+        points = np.sort(points - edges[0])
+        before = np.searchsorted(points, edges - edges[0])
+        sums = np.concatenate(([0.0], np.cumsum(points)))[before]
+        return before * (edges - edges[0]) - sums
+
+    return np.diff(integral(starts) - integral(ends))
+
+def _write_chunk(directory, number, columns):
+    """
+    Writes the finished windows as a chunk of the log. The chunk is written under a
+    temporary name and renamed when complete, so readers only see whole chunks.
+    """
+    name = f'windows-{number:06d}.npz'
+    temporary = os.path.join(directory, '.' + name)
+    with open(temporary, 'wb') as outfile:
+        np.savez(outfile, **columns)
+    os.replace(temporary, os.path.join(directory, name))
+
+def simulate_stream(directory, num_machines, rho, mu, number_of_customers, window=100.0, distribution='M',
+                    chunk_size=100000, seed=None):
+    """
+    Long FIFO run in constant memory. The customers are simulated in chunks, and
+    per time window the mean wait of the customers arriving in it, the time
+    average queue length and the utilisation of the servers are written to a log
+    of chunks in directory, as soon as no later customer can change the window.
+    The log can be read with read_stream while the run is going.
+
+    :param directory: directory of the log, created when it does not exist
+    :param num_machines: (C) number of counters
+    :param rho: system load
+    :param mu: service rate
+    :param number_of_customers: number of arriving customers
+    :param window: length of the time windows
+    :param distribution: distribution of the service times, 'M', 'D' or 'F'
+    :param chunk_size: number of customers simulated at once
+    :param seed: seed or numpy random Generator
+    :return: dict with the Customers, MeanWaitingTime over the whole run and the
+        number of Windows written
+    """
+    os.makedirs(directory, exist_ok=True)
+    if glob.glob(os.path.join(directory, 'windows-*.npz')):
+        raise ValueError(f'{directory} already holds a log')
+
+    rng = np.random.default_rng(seed)
+    lambda_ = rho * (mu * num_machines)
+
+    free = [0.0] * num_machines
+    last_arrival = 0.0
+    total_waits, chunks = 0.0, 0
+
+    # Sums of the windows which are not written yet, from window first on
+    first = 0
+    queue_area, busy_area, wait_sums, arrivals_count = (np.zeros(0) for _ in range(4))
+
+    for done in range(0, number_of_customers, chunk_size):
+        n = min(chunk_size, number_of_customers - done)
+        arrivals = last_arrival + np.cumsum(rng.exponential(1 / lambda_, size=n))
+        services = service_times(rng, n, mu, distribution)
+        waits = fifo_waiting_times(arrivals, services, num_machines, free)
+        starts = arrivals + waits
+        last_arrival = arrivals[-1]
+        total_waits += waits.sum()
+
+        # Grow the pending windows up to the last departure of the chunk
+        last = int((starts + services).max() // window)
+        grow = last - first + 1 - len(queue_area)
+        if grow > 0:
+            queue_area, busy_area, wait_sums, arrivals_count = (
+                np.concatenate((values, np.zeros(grow))) for values in (queue_area, busy_area, wait_sums, arrivals_count))
+
+        edges = (first + np.arange(len(queue_area) + 1)) * window
+        queue_area += _areas(arrivals, starts, edges)
+        busy_area += _areas(starts, starts + services, edges)
+        index = (arrivals // window).astype(np.int64) - first
+        wait_sums += np.bincount(index, weights=waits, minlength=len(wait_sums))
+        arrivals_count += np.bincount(index, minlength=len(arrivals_count))
+
+        # Later customers arrive after the last arrival, so earlier windows are done
+        finished = len(queue_area) if done + n == number_of_customers else int(last_arrival // window) - first
+        if finished > 0:
+            with np.errstate(invalid='ignore'):
+                _write_chunk(directory, chunks, {
+                    'Window': first + np.arange(finished),
+                    'Start': (first + np.arange(finished)) * window,
+                    'Arrivals': arrivals_count[:finished].astype(np.int64),
+                    'MeanWaitingTime': wait_sums[:finished] / arrivals_count[:finished],
+                    'QueueLength': queue_area[:finished] / window,
+                    'Utilisation': busy_area[:finished] / (window * num_machines)})
+            chunks += 1
+            first += finished
+            queue_area, busy_area, wait_sums, arrivals_count = (
+                values[finished:] for values in (queue_area, busy_area, wait_sums, arrivals_count))
+
+    return {'Customers': number_of_customers, 'MeanWaitingTime': total_waits / number_of_customers,
+            'Windows': first}
+
+def read_stream(directory):
+    """
+    Reads the windows which are written to the log so far.
+
+    :param directory: directory of the log
+    :return: DataFrame with a row per window
+    """
+    parts = []
+    for path in sorted(glob.glob(os.path.join(directory, 'windows-*.npz'))):
+        with np.load(path) as chunk:
+            parts.append(pd.DataFrame({column: chunk[column] for column in COLUMNS}))
+    if not parts:
+        return pd.DataFrame(columns=COLUMNS)
+    return pd.concat(parts, ignore_index=True)
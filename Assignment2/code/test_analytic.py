@@ -0,0 +1,50 @@
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import analytic
+import fastqueue
+
+
+@pytest.mark.parametrize('rho', [0.3, 0.9])
+def test_closed_forms(rho):
+    mu = 2.5
+    assert analytic.mmc_wait(1, rho, mu) == pytest.approx(rho / (mu * (1 - rho)))
+    assert analytic.mmc_wait(2, rho, mu) == pytest.approx(rho ** 2 / (mu * (1 - rho ** 2)))
+    assert analytic.mdc_wait(1, rho, mu) == pytest.approx(rho / (2 * mu * (1 - rho)))
+    scv = analytic.SCV['F']
+    assert analytic.expected_wait(1, rho, mu, 'F') == pytest.approx(((1 + scv) / 2 * rho / (mu * (1 - rho)), True))
+
+
+@pytest.mark.parametrize('num_machines', [1, 2, 4, 10])
+def test_erlang_c_equals_the_sum(num_machines):
+    rho = 0.8
+    a = rho * num_machines
+    top = a ** num_machines / math.factorial(num_machines) / (1 - rho)
+    bottom = sum(a ** k / math.factorial(k) for k in range(num_machines)) + top
+    assert analytic.erlang_c(num_machines, rho) == pytest.approx(top / bottom)
+
+
+def test_shortest_job_first_waits_less():
+    for rho in (0.5, 0.9):
+        assert analytic.sjf_wait(rho, 2.5) < analytic.mmc_wait(1, rho, 2.5)
+
+
+def test_references_need_a_steady_state():
+    with pytest.raises(ValueError):
+        analytic.mmc_wait(1, 1.0, 2.5)
+    with pytest.raises(ValueError):
+        analytic.expected_wait(2, 0.9, 2.5, method='prior')
+
+
+@pytest.mark.parametrize('method', ['FIFO', 'prior'])
+def test_simulations_agree_with_the_references(method):
+    rng = np.random.default_rng(0)
+    data = [[fastqueue.simulate(servers, 0.7, 2.5, 20000, method, seed=rng)[2000:].mean(), servers, method]
+            for servers in ((1,) if method == 'prior' else (1, 2)) for _ in range(20)]
+    df = pd.DataFrame(data, columns=['MeanWaitingTime', 'Servers', 'Method'])
+    scores = analytic.z_scores(df, rho=0.7)
+    assert len(scores) == len(df['Servers'].unique())
+    assert not scores['Deviates'].any()
@@ -0,0 +1,50 @@
+import random
+
+import numpy as np
+import pytest
+import simpy
+
+import des
+from collectors import Histogram, RunningStats, WaitingTimes
+
+
+def run(collector, seed=1):
+    random.seed(seed)
+    env = simpy.Environment()
+    env.process(des.setup(env, 2, 0.9, 2.5, 2000, collector=collector))
+    env.run()
+    return collector
+
+
+@pytest.fixture(scope='module')
+def waits():
+    return np.array(run(WaitingTimes()).values)
+
+
+@pytest.mark.parametrize('collector', [RunningStats, Histogram])
+def test_collectors_equal_the_list(waits, collector):
+    collected = run(collector())
+    assert collected.count == len(waits)
+    assert collected.mean == pytest.approx(waits.mean(), rel=1e-12)
+    assert collected.variance == pytest.approx(waits.var(ddof=1), rel=1e-9)
+
+
+def test_histogram_quantiles_are_within_a_bin(waits):
+    histogram = run(Histogram(bin_width=0.01))
+    for p in (0.1, 0.5, 0.9, 0.99):
+        assert histogram.quantile(p) == pytest.approx(np.quantile(waits, p), abs=0.01)
+    assert histogram.counts.sum() + histogram.overflow == len(waits)
+
+
+def test_histogram_overflow():
+    histogram = Histogram(bin_width=1, max_value=2)
+    for waiting_time in (0.5, 1.5, 5):
+        histogram.add(waiting_time)
+    assert histogram.overflow == 1
+    assert histogram.quantile(0.9) == np.inf
+
+
+def test_empty_collectors():
+    for collector in (WaitingTimes(), RunningStats(), Histogram()):
+        assert collector.count == 0
+        assert np.isnan(collector.mean) and np.isnan(collector.variance)
@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+import estimation
+import fastqueue
+
+
+def test_mser5_cuts_the_warm_up():
+    waits = np.concatenate((np.linspace(10, 1, 200), np.random.default_rng(0).normal(1, 0.1, 2000)))
+    assert 150 <= estimation.mser5(waits) <= 250
+    assert estimation.mser5(np.ones(1000)) == 0
+
+
+def test_batch_means():
+    waits = np.arange(100, dtype=float)
+    mean, half_width = estimation.batch_means(waits, batches=4)
+    assert mean == pytest.approx(waits.mean())
+    assert half_width > 0
+
+
+def test_sequential_run_continues_the_run():
+    # With deterministic services the run only draws arrivals, so the continued run
+    # equals a single run of the same length from the same stream
+    result = estimation.sequential_run(2, 0.9, 2.5, 0, number_of_customers=1000, distribution='D',
+                                       max_customers=4000, seed=6)
+    assert result['Customers'] == 4000 and not result['TargetMet']
+
+    arrivals = np.cumsum(np.random.default_rng(6).exponential(1 / (0.9 * 2.5 * 2), size=4000))
+    waits = fastqueue.fifo_waiting_times(arrivals, np.full(4000, 1 / 2.5), 2)
+    cut = estimation.mser5(waits)
+    mean, half_width = estimation.batch_means(waits[cut:])
+    assert result['Truncated'] == cut
+    assert result['Mean'] == pytest.approx(mean, rel=1e-9)
+    assert result['HalfWidth'] == pytest.approx(half_width, rel=1e-9)
+
+
+@pytest.mark.parametrize('method', ['FIFO', 'prior'])
+def test_sequential_run_starts_like_simulate(method):
+    result = estimation.sequential_run(1, 0.5, 2.5, np.inf, number_of_customers=1000, method=method, seed=4)
+    waits = fastqueue.simulate(1, 0.5, 2.5, 1000, method, seed=4)
+    assert result['Customers'] == 1000 and result['TargetMet']
+    assert result['Mean'] == pytest.approx(estimation.batch_means(waits[estimation.mser5(waits):])[0], rel=1e-12)
+
+
+def test_sequential_replications_meet_the_target():
+    result = estimation.sequential_replications(1, 0.5, 2.5, 0.05, relative=True, number_of_customers=1000, seed=1)
+    assert result['TargetMet'] and result['HalfWidth'] <= 0.05 * result['Mean']
+    assert result['Customers'] == result['Replications'] * 1000
+
+
+def test_precision_table_has_a_row_per_cell():
+    df = estimation.precision_table(0.5, servers=(1, 2), methods=('FIFO', 'prior'), seed=0,
+                                    number_of_customers=500, max_replications=10)
+    assert len(df) == 4
+    assert set(df['Method']) == {'FIFO', 'prior'}
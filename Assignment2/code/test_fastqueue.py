@@ -0,0 +1,111 @@
+import random
+
+import numpy as np
+import pytest
+import simpy
+
+import des
+import fastqueue
+from collectors import WaitingTimes
+
+
+def replay(num_machines, rho, mu, number_of_customers, method, distribution, seed):
+    """
+    Runs setup with seeded arrival and service streams, and draws the same arrival
+    and service times in order, as the simpy model draws them.
+    """
+    arrival_random, service_random = random.Random(seed), random.Random(seed + 1)
+    collector = WaitingTimes()
+    env = simpy.Environment()
+    env.process(des.setup(env, num_machines, rho, mu, number_of_customers, method, distribution, collector,
+                          random.Random(seed), random.Random(seed + 1)))
+    env.run()
+
+    lambda_ = rho * (mu * num_machines)
+    arrivals = np.cumsum([arrival_random.expovariate(lambda_) for _ in range(number_of_customers)])
+    if distribution == 'D':
+        services = np.full(number_of_customers, 1 / mu)
+    elif distribution == 'F':
+        services = np.array([service_random.expovariate(mu * 0.8 if service_random.random() > 0.25 else mu * 4)
+                             for _ in range(number_of_customers)])
+    else:
+        services = np.array([service_random.expovariate(mu) for _ in range(number_of_customers)])
+    return np.array(collector.values), arrivals, services
+
+
+@pytest.mark.parametrize('num_machines', [1, 2, 4])
+@pytest.mark.parametrize('distribution', ['M', 'D', 'F'])
+def test_fifo_equals_simpy(num_machines, distribution):
+    simpy_waits, arrivals, services = replay(num_machines, 0.9, 2.5, 2000, 'FIFO', distribution, 3)
+    np.testing.assert_allclose(fastqueue.fifo_waiting_times(arrivals, services, num_machines), simpy_waits,
+                               rtol=1e-9, atol=1e-9)
+
+
+def test_simulate_first_customer_does_not_wait():
+    waits = fastqueue.simulate(2, 0.9, 2.5, 1000, seed=0)
+    assert len(waits) == 1000 and waits[0] == 0 and (waits >= 0).all()
+    np.testing.assert_array_equal(waits, fastqueue.simulate(2, 0.9, 2.5, 1000, seed=0))
+
+
+def test_simulate_refuses_unknown_methods():
+    with pytest.raises(ValueError):
+        fastqueue.simulate(1, 0.9, 2.5, 10, method='LIFO')
+    with pytest.raises(ValueError):
+        fastqueue.simulate(1, 0.9, 2.5, 10, distribution='G')
+
+
+@pytest.mark.parametrize('num_machines', [1, 3])
+def test_batch_rows_equal_single_runs(num_machines):
+    rng = np.random.default_rng(4)
+    arrivals = np.cumsum(rng.exponential(1, size=(5, 500)), axis=1)
+    services = rng.exponential(0.9 * num_machines, size=(5, 500))
+    waits = fastqueue.fifo_waiting_times(arrivals, services, num_machines)
+    for row in range(5):
+        np.testing.assert_allclose(waits[row], fastqueue.fifo_waiting_times(arrivals[row], services[row], num_machines))
+
+
+def test_rho_sweep_table():
+    df = fastqueue.rho_sweep([0.5, 0.9], [1, 2], 2.5, 500, 4, seed=0)
+    assert list(df.columns) == ['MeanWaitingTime', 'CustomerCount', 'Servers', 'Rho']
+    assert len(df) == 2 * 2 * 4
+    means = df.groupby('Rho')['MeanWaitingTime'].mean()
+    assert means[0.5] < means[0.9]
+
+
+@pytest.mark.parametrize('num_machines', [1, 2, 4])
+@pytest.mark.parametrize('distribution', ['M', 'D'])
+def test_priority_equals_simpy(num_machines, distribution):
+    # The collector of the simpy model is in order of service, so the waits are compared sorted
+    simpy_waits, arrivals, services = replay(num_machines, 0.9, 2.5, 2000, 'prior', distribution, 5)
+    job_lengths = services if distribution == 'M' else np.full(len(arrivals), 2.5)
+    waits = fastqueue.priority_waiting_times(arrivals, job_lengths, num_machines)
+    np.testing.assert_allclose(np.sort(waits), np.sort(simpy_waits), rtol=1e-9, atol=1e-9)
+
+
+def test_priority_takes_the_shortest_waiting_job():
+    # The first job keeps the server busy, then the shortest of the waiting jobs goes first
+    waits = fastqueue.priority_waiting_times([0, 1, 2, 3], [10, 5, 1, 3], 1)
+    np.testing.assert_allclose(waits, [0, 14 - 1, 10 - 2, 11 - 3])
+
+
+def test_random_numbers_are_common_and_antithetic():
+    uniforms = fastqueue.random_numbers(100, seed=np.random.SeedSequence(8))
+    again = fastqueue.random_numbers(100, seed=np.random.SeedSequence(8))
+    antithetic = fastqueue.random_numbers(100, seed=np.random.SeedSequence(8), antithetic=True)
+    for name in ('arrival', 'service', 'mixture'):
+        np.testing.assert_array_equal(uniforms[name], again[name])
+        np.testing.assert_array_equal(antithetic[name], 1 - uniforms[name])
+
+
+def test_common_random_numbers_reduce_the_variance():
+    configurations = [(1, 0.8, 'FIFO'), (1, 0.8, 'prior')]
+    df, common = fastqueue.compare_configurations(configurations, 2.5, 500, 30, seed=2)
+    _, independent = fastqueue.compare_configurations(configurations, 2.5, 500, 30, seed=2, common=False)
+    assert len(df) == 2 * 30
+    assert common['VarianceRatio'][0] > 1.5 * independent['VarianceRatio'][0]
+
+
+def test_antithetic_pairs():
+    df, ratio = fastqueue.antithetic_replications(1, 0.8, 2.5, 500, 20, seed=2)
+    assert len(df) == 40 and df['Antithetic'].sum() == 20
+    assert ratio > 1
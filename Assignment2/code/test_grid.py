@@ -0,0 +1,32 @@
+import numpy as np
+import pandas as pd
+
+import grid
+
+
+def test_task_seed_ignores_numpy_scalars():
+    assert grid.task_seed(np.int64(0), (np.int64(2), np.float64(0.9), 'FIFO', 'M'), np.int64(1)) == \
+        grid.task_seed(0, (2, 0.9, 'FIFO', 'M'), 1)
+    assert grid.task_seed(0, (2, 0.9, 'FIFO', 'M'), 1) != grid.task_seed(0, (2, 0.9, 'FIFO', 'M'), 2)
+
+
+def test_rows_do_not_depend_on_workers(tmp_path):
+    kwargs = dict(servers=(1, 2), replications=3, number_of_customers=200, engine='fast')
+    single = grid.run_grid(tmp_path / 'single.csv', workers=1, **kwargs)
+    pool = grid.run_grid(tmp_path / 'pool.csv', workers=2, **kwargs)
+    key = ['Servers', 'Replication']
+    pd.testing.assert_frame_equal(single.sort_values(key, ignore_index=True), pool.sort_values(key, ignore_index=True))
+
+
+def test_restart_skips_finished_replications(tmp_path):
+    path = tmp_path / 'grid.csv'
+    grid.run_grid(path, servers=(1,), replications=2, number_of_customers=200, workers=1, engine='fast')
+    # A killed run leaves a cut off line, which is removed
+    with open(path, 'a') as outfile:
+        outfile.write('0.5,200,1')
+
+    df = grid.run_grid(path, servers=(np.int64(1),), rhos=(np.float64(0.9),), replications=3,
+                       number_of_customers=np.int64(200), workers=1, engine='fast')
+    assert list(df.columns) == grid.COLUMNS
+    assert sorted(df['Replication']) == [0, 1, 2]
+    assert (df['CustomerCount'] == 200).all()
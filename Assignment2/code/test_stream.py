@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+import fastqueue
+import stream
+
+
+def overlaps(starts, ends, edges):
+    """
+    Time that every interval [start, end) spends in every window, summed per window.
+    """
+    low, high = edges[:-1], edges[1:]
+    return np.clip(np.minimum(ends[:, None], high) - np.maximum(starts[:, None], low), 0, None).sum(axis=0)
+
+
+@pytest.mark.parametrize('chunk_size', [300, 3000])
+def test_windows_equal_direct_computation(tmp_path, chunk_size):
+    # Deterministic services draw nothing, so every chunk size gives the same arrivals
+    num_machines, rho, mu, n, window = 2, 0.9, 2.5, 3000, 20.0
+    result = stream.simulate_stream(tmp_path, num_machines, rho, mu, n, window, 'D', chunk_size, seed=9)
+    df = stream.read_stream(tmp_path)
+    assert list(df.columns) == stream.COLUMNS
+    assert list(df['Window']) == list(range(result['Windows']))
+
+    arrivals = np.cumsum(np.random.default_rng(9).exponential(1 / (rho * mu * num_machines), size=n))
+    services = np.full(n, 1 / mu)
+    waits = fastqueue.fifo_waiting_times(arrivals, services, num_machines)
+    starts = arrivals + waits
+    edges = np.arange(result['Windows'] + 1) * window
+
+    assert result['MeanWaitingTime'] == pytest.approx(waits.mean(), rel=1e-9)
+    np.testing.assert_array_equal(df['Arrivals'], np.histogram(arrivals, edges)[0])
+    np.testing.assert_allclose(df['QueueLength'], overlaps(arrivals, starts, edges) / window, atol=1e-9)
+    np.testing.assert_allclose(df['Utilisation'], overlaps(starts, starts + services, edges) / (window * num_machines),
+                               atol=1e-9)
+    index = (arrivals // window).astype(int)
+    with np.errstate(invalid='ignore'):
+        expected = np.bincount(index, waits, len(edges) - 1) / np.bincount(index, minlength=len(edges) - 1)
+    np.testing.assert_allclose(df['MeanWaitingTime'], expected, atol=1e-9)
+
+
+def test_continued_fifo_chunks_equal_a_single_run():
+    rng = np.random.default_rng(5)
+    arrivals = np.cumsum(rng.exponential(1, 4000))
+    services = rng.exponential(0.8 * 3, 4000)
+    for num_machines in (1, 3):
+        free = [0.0] * num_machines
+        waits = np.concatenate([fastqueue.fifo_waiting_times(arrivals[part], services[part], num_machines, free)
+                                for part in (slice(0, 1000), slice(1000, 1500), slice(1500, None))])
+        np.testing.assert_allclose(waits, fastqueue.fifo_waiting_times(arrivals, services, num_machines))
+
+
+def test_a_log_is_not_overwritten(tmp_path):
+    assert stream.read_stream(tmp_path).empty
+    stream.simulate_stream(tmp_path, 1, 0.5, 2.5, 100, seed=0)
+    with pytest.raises(ValueError):
+        stream.simulate_stream(tmp_path, 1, 0.5, 2.5, 100, seed=0)
@@ -1,3 +1,4 @@
+import math
 import numpy as np
 import pandas as pd
 import random
@@ -56,7 +57,7 @@ class SimAnneal:
     """
     Class object to perform simulated annealing
     """
-    def __init__(self, type, T0, sched, chain_length, method, params=None):
+    def __init__(self, type, T0, sched, chain_length, method, params=None, neighbours=None):
         """
         Initialization of the SimAnneal class.
 
@@ -67,10 +68,11 @@ class SimAnneal:
         Nmax:   (integer)          Maximal number of cycles
         sched:  (integer)          the cooling schedule to use
         B:      (float)            B parameter for cooling scheds
+        neighbours: (integer)      number of nearest nodes for the 2-opt and or-opt moves, all when None
         """
 
         data, data_tour = get_data(type)
-        self.Map = Map(type, data.node_coords, data_tour.tours[0])
+        self.Map = Map(type, data.node_coords, data_tour.tours[0], neighbours)
         self.T0 = T0
         self.sched = sched
         self.chain_length = chain_length
@@ -84,25 +86,28 @@ class SimAnneal:
 
     def run(self, Nmax=10000):
         """
-        Performs simulated annealing
+        Performs simulated annealing. A proposal only reads a few values, so the
+        loop works on Python scalars, with random and math instead of numpy.
         """
+        distances = self.output_data['Distances']
+        iterations = self.output_data['Iteration']
+        temperatures = self.output_data['Temperature']
+        distance = distances[-1]
+
         for iteration in range(Nmax):
             T = self.coolscheds(self.sched, self.T0, iteration, self.params)
             for chain in range(self.chain_length):
 
-                new_nodes, new_edges, new_distance = self.sampling_method(self.method)
-
-                p = np.exp(-(new_distance - self.output_data['Distances'][-1])/T)
+                # Only the change in length is known, the tour changes when accepted
+                move, delta = self.sampling_method(self.method)
 
-                if (new_distance < self.output_data['Distances'][-1]) | (p > np.random.uniform()):
-                    self.Map.nodes = new_nodes
-                    self.Map.edges = new_edges
-                    self.output_data['Distances'].append(new_distance)
-                else:
-                    self.output_data['Distances'].append(self.output_data['Distances'][-1])
+                if (delta < 0) or (math.exp(-delta/T) > random.random()):
+                    self.Map.apply_move(move)
+                    distance += delta
 
-                self.output_data['Iteration'].append(iteration + chain)
-                self.output_data['Temperature'].append(T)
+                distances.append(distance)
+                iterations.append(iteration + chain)
+                temperatures.append(T)
 
         df = pd.DataFrame(self.output_data)
         return df
@@ -126,14 +131,25 @@ class SimAnneal:
         #     T = self.coolsched3(T0, iteration, params)
 
     def sampling_method(self, method):
+        """
+        Proposes a move of the given method
+
+        Returns
+            move    (tuple)             the move, to apply with Map.apply_move
+            delta   (float)             change in tour length of the move
+        """
 
         if method == 1:
-            new_nodes, new_edges, new_distance = self.Map._1SwapNode_()
+            move, delta = self.Map._1SwapNode_()
         elif method == 2:
-            new_nodes, new_edges, new_distance = self.Map._SwapNodes_()
+            move, delta = self.Map._SwapNodes_()
         elif method == 3:
-            new_nodes, new_edges, new_distance = self.Map._BreakChainNodes_()
+            move, delta = self.Map._BreakChainNodes_()
         elif method == 4:
-            new_nodes, new_edges, new_distance = self.Map._Combined_()
+            move, delta = self.Map._Combined_()
+        elif method == 5:
+            move, delta = self.Map._InverseNodes_()
+        elif method == 6:
+            move, delta = self.Map._OrOpt_()
 
-        return new_nodes, new_edges, new_distance
+        return move, delta
@@ -1,16 +1,16 @@
 import numpy as np
 import pandas as pd
-from scipy.spatial import distance_matrix
+from scipy.spatial import distance_matrix, cKDTree
 import matplotlib.pyplot as plt
 import random
 import tsplib95
-import copy
+from tour import Tour
 
 class Map():
     """
     The map that holds all nodes and tours.
     """
-    def __init__(self, name, coords, optimal_tour):
+    def __init__(self, name, coords, optimal_tour, neighbours=None):
         """
         Initialization of the map class.
 
@@ -20,18 +20,46 @@ class Map():
         nodes:   (list)         the list of the nodes in order of the tour
         coords: (ndarray)       list with coordinate sets in the order of the tour
         optimal_tour: (ndarray) list of nodes in the order of the optimal tour
+        neighbours: (integer)   number of nearest nodes the 2-opt and or-opt moves
+                                connect a node to, all nodes when None
         """
 
         self.name = name
         self.coords = coords
 
         self.distance_matrix = self.create_distance_matrix()
+        # Rounded distances indexed by the node numbers, which start at 1, as
+        # lists of floats, which are faster than an array to read single values
+        lengths = np.zeros((len(self.distance_matrix) + 1,) * 2)
+        lengths[1:, 1:] = np.round(self.distance_matrix)
+        self.lengths = lengths.tolist()
 
-        self.nodes = random.sample(list(self.coords.keys()), len(list(self.coords.keys())))
-        self.edges = self.make_edges_of_tour(self.nodes)
+        self.tour = Tour(random.sample(list(self.coords.keys()), len(list(self.coords.keys()))))
+
+        self.neighbours = neighbours
+        if neighbours is not None:
+            self.candidates = self.create_candidates(neighbours).tolist()
 
         self.optimal_tour = optimal_tour
 
+    @property
+    def nodes(self):
+        """
+        The nodes in the order of the tour, as a new list
+        """
+        return self.tour.tolist()
+
+    @nodes.setter
+    def nodes(self, nodes):
+        self.tour = Tour(nodes)
+
+    @property
+    def edges(self):
+        """
+        The edges of the tour, made from the tour when asked for
+        """
+        return self.make_edges_of_tour(self.tour.order)
+
     def __repr__(self):
 
         fig, axis = plt.subplots(figsize=(14,10))
@@ -54,6 +82,29 @@ class Map():
                                        list(self.coords.values()), p=2)
         return distance_mat
 
+    def create_candidates(self, k):
+        """
+        Finds the k nearest nodes of every node with a KD-tree on the coordinates
+
+        Args:
+            k (integer)             number of nearest nodes, at least 1 and below the number of nodes
+
+        Returns:
+            candidates (ndarray)    the k nearest nodes, indexed by the node number
+        """
+        if not 1 <= k < len(self.coords):
+            raise ValueError(f'neighbours should be between 1 and {len(self.coords) - 1} for {self.name}, got {k}')
+
+        ids = np.asarray(list(self.coords.keys()))
+        points = np.asarray(list(self.coords.values()))
+        _, inds = cKDTree(points).query(points, k=k + 1)
+
+        # The node itself is left out, also when other nodes have the same coordinates
+        candidates = np.zeros((ids.max() + 1, k), dtype=np.int32)
+        for node, nearest in zip(ids, ids[inds]):
+            candidates[node] = nearest[nearest != node][:k]
+        return candidates
+
     def make_edges_of_tour(self, nodes):
         """
         Creates a list of edges
@@ -62,10 +113,8 @@ class Map():
             nodes_list (ndarray)    list with edges
         """
 
-        #loop through nodes list
-
-        edges = [nodes, nodes[1:] + [nodes[0]]]
-        nodes_list = np.asarray(edges).T
+        nodes = np.asarray(nodes)
+        nodes_list = np.stack([nodes, np.roll(nodes, -1)]).T
 
         return nodes_list
 
@@ -90,97 +139,233 @@ class Map():
 
         return distance
 
-    def _1SwapNode_(self):
+    def _length_(self, start, end):
+        """
+        Rounded distance between two nodes, as summed in calculate_tour_length
+        """
+        return self.lengths[start][end]
 
+    def _random_pair_(self):
+        """
+        Draws two different indices of the tour
+        """
+        n = len(self.tour)
         while True:
-            inds = np.random.randint(0, len(self.nodes),size=2)
-            if inds[0] != inds[1]:
-                break
-        ix1 = inds[0]
-        ix2 = inds[1]
+            ix1, ix2 = random.randrange(n), random.randrange(n)
+            if ix1 != ix2:
+                return ix1, ix2
+
+    def _1SwapNode_(self):
+        """
+        Proposes to move a node to another index of the tour. Only the change
+        in tour length is calculated, from the broken and added edges.
+
+        Returns:
+            move  (tuple)   the move, to apply with apply_move
+            delta (float)   change in tour length
+        """
+        ix1, ix2 = self._random_pair_()
+        nodes = self.tour.order
+        n = len(nodes)
 
-        new_nodes = copy.copy(self.nodes)
-        selected_node = new_nodes[ix1]
-        new_nodes.remove(selected_node)
-        new_nodes.insert(ix2, selected_node)
+        # The neighbours of the node are joined
+        node, before, after = nodes[ix1], nodes[ix1 - 1], nodes[(ix1 + 1) % n]
 
-        new_edges = self.make_edges_of_tour(new_nodes)
-        new_distance = self.calculate_tour_length(new_edges)
-        return new_nodes, new_edges, new_distance
+        # It is inserted at ix2 of the tour without the node
+        k = (ix2 - 1) % (n - 1)
+        left = nodes[k if k < ix1 else k + 1]
+        k = ix2 % (n - 1)
+        right = nodes[k if k < ix1 else k + 1]
+
+        lengths = self.lengths
+        delta = (lengths[before][after] - lengths[before][node] - lengths[node][after]
+                 + lengths[left][node] + lengths[node][right] - lengths[left][right])
+        return ('1swap', ix1, ix2), delta
 
     def _SwapNodes_(self):
         """
-        Swaps two nodes and all values that are linked to these nodes
+        Proposes to swap two nodes. Only the change in tour length is
+        calculated, from the edges at both nodes.
 
-        Args:
-            inds (tuple)    indices of two nodes that will be swapped
+        Returns:
+            move  (tuple)   the move, to apply with apply_move
+            delta (float)   change in tour length
         """
+        ix1, ix2 = self._random_pair_()
+        nodes = self.tour.order
+        n = len(nodes)
 
-        while True:
-            inds = np.random.randint(0, len(self.nodes),size=2)
-            if inds[0] != inds[1]:
-                break
-        ix1 = inds[0]
-        ix2 = inds[1]
-
-        new_nodes = copy.copy(self.nodes)
-        new_nodes[ix1], new_nodes[ix2] = new_nodes[ix2], new_nodes[ix1]
+        def swapped(k):
+            return nodes[ix2] if k == ix1 else nodes[ix1] if k == ix2 else nodes[k]
 
-        new_edges = self.make_edges_of_tour(new_nodes)
-        new_distance = self.calculate_tour_length(new_edges)
-        return new_nodes, new_edges, new_distance
+        # Edges k run from index k to k + 1, the set drops shared edges of neighbouring nodes
+        lengths = self.lengths
+        delta = 0
+        for k in {(ix1 - 1) % n, ix1, (ix2 - 1) % n, ix2}:
+            delta += lengths[swapped(k)][swapped((k + 1) % n)] - lengths[nodes[k]][nodes[(k + 1) % n]]
+        return ('swap', ix1, ix2), delta
 
     def _BreakChainNodes_(self):
+        """
+        Proposes to cut the tour in three chains a, b and c and to reorder them.
+        All three orders (a + c + b, b + a + c and c + b + a) are the same cycle,
+        so the change in tour length comes from the three edges between chains.
 
-        while True:
-            inds = np.random.randint(0, len(self.nodes), size=2)
-            if inds[0] != inds[1]:
-                break
+        Returns:
+            move  (tuple)   the move, to apply with apply_move
+            delta (float)   change in tour length
+        """
+        inds = self._random_pair_()
         ix1 = min(inds)
         ix2 = max(inds)
+        order = random.random()
+        nodes = self.tour.order
 
-        new_nodes = copy.copy(self.nodes)
-        a, b, c = new_nodes[:ix1], new_nodes[ix1:ix2], new_nodes[ix2:]
+        # Without chain a it is only a rotation of the tour
+        if ix1 == 0:
+            return ('chain', ix1, ix2, order), 0
 
-        _ = np.random.uniform()
-        if _ < 0.34:
-            new_nodes = a + c + b
-        elif (_ >= 0.34) & (_ < 0.67):
-            new_nodes = b + a + c
-        elif _ >= 0.67:
-            new_nodes = c + b + a
+        a_start, a_end = nodes[0], nodes[ix1 - 1]
+        b_start, b_end = nodes[ix1], nodes[ix2 - 1]
+        c_start, c_end = nodes[ix2], nodes[-1]
 
-        new_edges = self.make_edges_of_tour(new_nodes)
-        new_distance = self.calculate_tour_length(new_edges)
-        return new_nodes, new_edges, new_distance
+        lengths = self.lengths
+        delta = (lengths[a_end][c_start] + lengths[c_end][b_start] + lengths[b_end][a_start]
+                 - lengths[a_end][b_start] - lengths[b_end][c_start] - lengths[c_end][a_start])
+        return ('chain', ix1, ix2, order), delta
 
-    # def _InverseNodes_(self):
+    def apply_move(self, move):
+        """
+        Applies a move proposed by one of the move methods to the tour, in place.
 
-    #     while True:
-    #         inds = np.random.randint(0, len(self.nodes),size=2)
-    #         if inds[0] != inds[1]:
-    #             break
-    #     ix1 = min(inds)
-    #     ix2 = max(inds)
+        Args:
+            move (tuple)    the move
+        """
+        if move[0] == '1swap':
+            _, ix1, ix2 = move
+            self.tour.move(ix1, ix2)
+
+        elif move[0] == 'swap':
+            _, ix1, ix2 = move
+            self.tour.swap(ix1, ix2)
+
+        elif move[0] == 'inverse':
+            _, ix1, ix2 = move
+            self.tour.reverse(ix1, ix2 - 1)
+
+        elif move[0] == 'oropt':
+            _, start, end, to, reverse = move
+            if reverse:
+                self.tour.reverse(start, end - 1)
+            self.tour.move_segment(start, end, to)
+
+        elif move[0] == 'chain':
+            # Chains a, b and c are rotated in place into the chosen order
+            _, ix1, ix2, order = move
+            n = len(self.tour)
+            if order < 0.34:
+                self.tour.rotate(ix1, n, ix2 - ix1)
+            elif (order >= 0.34) & (order < 0.67):
+                self.tour.rotate(0, ix2, ix1)
+            elif order >= 0.67:
+                self.tour.rotate(0, n, ix2)
+                self.tour.rotate(n - ix2, n, ix1)
+
+    def _InverseNodes_(self):
+        """
+        Proposes a 2-opt move, which reverses the chain between two indices. The
+        change in tour length comes from the two edges at the ends of the chain.
+        With neighbours, the move connects a random node to one of its nearest
+        nodes.
 
-    #     new_nodes = copy.copy(self.nodes)
-    #     a, b, c = new_nodes[:ix1], new_nodes[ix1:ix2], new_nodes[ix2:]
-    #     b.reverse()
-    #     new_nodes = a + b + c
+        Returns:
+            move  (tuple)   the move, to apply with apply_move
+            delta (float)   change in tour length
+        """
+        nodes = self.tour.order
+        n = len(nodes)
+        if n < 3:
+            raise ValueError(f'A 2-opt move needs at least 3 nodes, {self.name} has {n}')
+
+        if self.neighbours is None:
+            inds = self._random_pair_()
+            ix1 = min(inds)
+            ix2 = max(inds)
+        else:
+            # New edges (a, c) and (after a, after c), reversing the chain after a up to c
+            a = nodes[random.randrange(n)]
+            c = self.candidates[a][random.randrange(self.neighbours)]
+            pos_a, pos_c = self.tour.position[a], self.tour.position[c]
+            ix1 = min(pos_a, pos_c) + 1
+            ix2 = max(pos_a, pos_c) + 1
+
+        a_end, b_start = nodes[ix1 - 1], nodes[ix1]
+        b_end, c_start = nodes[ix2 - 1], nodes[ix2 % n]
+
+        lengths = self.lengths
+        delta = lengths[a_end][b_end] + lengths[b_start][c_start] - lengths[a_end][b_start] - lengths[b_end][c_start]
+        return ('inverse', ix1, ix2), delta
+
+    def _OrOpt_(self):
+        """
+        Proposes an or-opt move, which moves a chain of one to three nodes
+        between two other nodes, in the orientation that gives the shortest
+        tour. The change in tour length comes from the three broken and three
+        added edges. With neighbours, the chain is moved next to one of the
+        nearest nodes of its first node.
 
+        Returns:
+            move  (tuple)   the move, to apply with apply_move
+            delta (float)   change in tour length
+        """
+        nodes = self.tour.order
+        n = len(nodes)
+        if n < 3:
+            raise ValueError(f'An or-opt move needs at least 3 nodes, {self.name} has {n}')
 
-    #     new_edges = self.make_edges_of_tour(new_nodes)
-    #     new_distance = self.calculate_tour_length(new_edges)
-    #     return new_nodes, new_edges, new_distance
+        # The chain goes into the edge from index ix to ix + 1, an edge not at the chain
+        while True:
+            length = random.randint(1, 3)
+            start = random.randrange(n - length + 1)
+            end = start + length
+
+            def free(ix):
+                return not start - 1 <= ix < end and not (start == 0 and ix == n - 1)
+
+            if self.neighbours is None:
+                ix = random.randrange(n)
+                if free(ix):
+                    break
+            else:
+                # The edges before and after the near node, without those at the chain
+                near = self.tour.position[self.candidates[nodes[start]][random.randrange(self.neighbours)]]
+                sides = [ix % n for ix in (near - 1, near) if free(ix % n)]
+                if sides:
+                    ix = random.choice(sides)
+                    break
+
+        before, after = nodes[start - 1], nodes[end % n]
+        first, last = nodes[start], nodes[end - 1]
+        left, right = nodes[ix], nodes[(ix + 1) % n]
+
+        lengths = self.lengths
+        removed = lengths[before][first] + lengths[last][after] + lengths[left][right] - lengths[before][after]
+        forward = lengths[left][first] + lengths[last][right]
+        backward = lengths[left][last] + lengths[first][right]
+
+        reverse = backward < forward
+        return ('oropt', start, end, ix + 1, reverse), min(forward, backward) - removed
 
     def _Combined_(self):
-
-        _ = np.random.uniform()
+        """
+        Proposes one of the three moves at random.
+        """
+        _ = random.random()
         if _ < 0.34:
-            new_nodes, new_edges, new_distance = self._1SwapNode_()
+            move, delta = self._1SwapNode_()
         elif (_ >= 0.34) & (_ < 0.67):
-            new_nodes, new_edges, new_distance = self._SwapNodes_()
+            move, delta = self._SwapNodes_()
         elif _ >= 0.67:
-            new_nodes, new_edges, new_distance = self._BreakChainNodes_()
+            move, delta = self._BreakChainNodes_()
 
-        return new_nodes, new_edges, new_distance
+        return move, delta
@@ -0,0 +1,87 @@
+import os
+import random
+
+import pytest
+import tsplib95
+
+from anneal import SimAnneal
+from map import Map
+
+DATA = os.path.join(os.path.dirname(__file__), 'data')
+
+
+def eil51(neighbours=None):
+    data = tsplib95.load(os.path.join(DATA, 'eil51.tsp.txt'))
+    tour = tsplib95.load(os.path.join(DATA, 'eil51.opt.tour.txt'))
+    return Map('eil51', data.node_coords, tour.tours[0], neighbours)
+
+
+def check_deltas(graph, move_name, proposals):
+    nodes = sorted(graph.nodes)
+    for _ in range(proposals):
+        before = graph.calculate_tour_length(graph.edges)
+        move, delta = getattr(graph, move_name)()
+        graph.apply_move(move)
+        assert graph.calculate_tour_length(graph.edges) - before == pytest.approx(delta, abs=1e-9), move
+    assert sorted(graph.nodes) == nodes
+    assert all(graph.tour.position[node] == ix for ix, node in enumerate(graph.tour.order))
+
+
+@pytest.mark.parametrize('move_name', ['_1SwapNode_', '_SwapNodes_', '_BreakChainNodes_', '_Combined_'])
+def test_deltas_equal_full_recomputation(move_name):
+    random.seed(0)
+    check_deltas(eil51(), move_name, 1000)
+
+
+@pytest.mark.parametrize('method', [1, 2, 3, 4])
+def test_annealing_tracks_the_tour_length(monkeypatch, method):
+    monkeypatch.chdir(os.path.dirname(os.path.abspath(__file__)))
+    random.seed(1)
+    anneal = SimAnneal('eil51', 50, 1, 20, method)
+    df = anneal.run(Nmax=20)
+    assert df['Distances'].iloc[-1] == anneal.Map.calculate_tour_length(anneal.Map.edges)
+
+
+@pytest.mark.parametrize('neighbours', [None, 5])
+@pytest.mark.parametrize('move_name', ['_InverseNodes_', '_OrOpt_'])
+def test_2opt_and_oropt_deltas_equal_full_recomputation(move_name, neighbours):
+    random.seed(0)
+    check_deltas(eil51(neighbours), move_name, 1000)
+
+
+def test_candidates_are_the_nearest_other_nodes():
+    graph = eil51(5)
+    for node in graph.coords:
+        distances = sorted((graph._length_(node, other), other) for other in graph.coords if other != node)
+        assert node not in graph.candidates[node]
+        assert max(graph._length_(node, other) for other in graph.candidates[node]) == distances[4][0]
+    with pytest.raises(ValueError):
+        eil51(51)
+
+
+@pytest.mark.parametrize('n', [3, 4])
+@pytest.mark.parametrize('neighbours', [None, 1])
+def test_small_tours(n, neighbours):
+    random.seed(0)
+    coords = {i + 1: (float(i), float(i * i % 7)) for i in range(n)}
+    graph = Map('small', coords, list(coords), neighbours)
+    for move_name in ('_InverseNodes_', '_OrOpt_'):
+        check_deltas(graph, move_name, 200)
+
+
+@pytest.mark.parametrize('n', [1, 2])
+def test_tours_below_three_nodes_are_refused(n):
+    coords = {i + 1: (float(i), 0.0) for i in range(n)}
+    graph = Map('small', coords, list(coords))
+    for move_name in ('_InverseNodes_', '_OrOpt_'):
+        with pytest.raises(ValueError):
+            getattr(graph, move_name)()
+
+
+@pytest.mark.parametrize('method', [5, 6])
+def test_annealing_tracks_the_tour_length_with_candidates(monkeypatch, method):
+    monkeypatch.chdir(os.path.dirname(os.path.abspath(__file__)))
+    random.seed(1)
+    anneal = SimAnneal('eil51', 50, 1, 20, method, neighbours=5)
+    df = anneal.run(Nmax=20)
+    assert df['Distances'].iloc[-1] == anneal.Map.calculate_tour_length(anneal.Map.edges)
@@ -0,0 +1,60 @@
+import random
+
+import pytest
+
+from tour import Tour
+
+
+def check(tour, expected):
+    assert tour.tolist() == expected
+    assert all(tour.position[node] == ix for ix, node in enumerate(expected))
+
+
+def test_operations_equal_list_operations():
+    random.seed(0)
+    nodes = random.sample(range(1, 31), 30)
+    tour, expected = Tour(nodes), list(nodes)
+    check(tour, expected)
+
+    for _ in range(500):
+        ix1, ix2 = sorted(random.sample(range(30), 2))
+        operation = random.choice(['swap', 'reverse', 'rotate', 'move', 'move_segment'])
+        if operation == 'swap':
+            tour.swap(ix1, ix2)
+            expected[ix1], expected[ix2] = expected[ix2], expected[ix1]
+        elif operation == 'reverse':
+            tour.reverse(ix1, ix2)
+            expected[ix1:ix2 + 1] = expected[ix1:ix2 + 1][::-1]
+        elif operation == 'rotate':
+            shift = random.randrange(-40, 40)
+            tour.rotate(ix1, ix2, shift)
+            segment = expected[ix1:ix2]
+            shift %= len(segment)
+            expected[ix1:ix2] = segment[shift:] + segment[:shift]
+        elif operation == 'move':
+            ix1, ix2 = random.sample(range(30), 2)
+            tour.move(ix1, ix2)
+            expected.insert(ix2, expected.pop(ix1))
+        else:
+            start, end = ix1, ix2
+            to = random.choice([ix for ix in range(31) if not start < ix < end])
+            tour.move_segment(start, end, to)
+            segment = expected[start:end]
+            rest = expected[:start] + expected[end:]
+            at = to if to <= start else to - (end - start)
+            expected = rest[:at] + segment + rest[at:]
+        check(tour, expected)
+
+
+def test_neighbours_wrap_around():
+    tour = Tour([3, 1, 2])
+    assert tour.next(2) == 3 and tour.prev(3) == 2
+    assert tour.next(3) == 1 and tour.prev(1) == 3
+    assert len(tour) == 3 and tour[1] == 1
+
+
+@pytest.mark.parametrize('nodes', [[1], [2, 1]])
+def test_small_tours(nodes):
+    tour = Tour(nodes)
+    tour.rotate(0, len(nodes), 1)
+    check(tour, nodes[1:] + nodes[:1])
@@ -0,0 +1,101 @@
+class Tour():
+    """
+    A tour as a list of the nodes in order, with the inverse list of the index
+    of every node. Changes are made in place, so proposals never copy the tour,
+    and accepted moves only touch the part of the tour they change. Plain lists
+    of ints are used, as the moves read a handful of single nodes per proposal.
+    """
+    def __init__(self, nodes):
+        """
+        Initialization of the tour class.
+
+        Args:
+
+        nodes:  (list)      the nodes in the order of the tour
+        """
+        self.order = [int(node) for node in nodes]
+        self.position = [0] * (max(self.order) + 1)
+        self._index(0, len(self.order))
+
+    def __len__(self):
+        return len(self.order)
+
+    def __getitem__(self, index):
+        return self.order[index]
+
+    def _index(self, start, end):
+        """
+        Updates the positions of the nodes from index start up to end.
+        """
+        order, position = self.order, self.position
+        for ix in range(start, end):
+            position[order[ix]] = ix
+
+    def tolist(self):
+        """
+        Returns:
+            nodes   (list)      the nodes in the order of the tour
+        """
+        return list(self.order)
+
+    def next(self, node):
+        """
+        Returns:
+            node    (integer)   the node after node in the tour
+        """
+        return self.order[(self.position[node] + 1) % len(self.order)]
+
+    def prev(self, node):
+        """
+        Returns:
+            node    (integer)   the node before node in the tour
+        """
+        return self.order[self.position[node] - 1]
+
+    def swap(self, ix1, ix2):
+        """
+        Swaps the nodes at two indices.
+        """
+        order = self.order
+        order[ix1], order[ix2] = order[ix2], order[ix1]
+        self.position[order[ix1]] = ix1
+        self.position[order[ix2]] = ix2
+
+    def reverse(self, start, end):
+        """
+        Reverses the nodes from index start up to and including index end.
+        """
+        self.order[start:end + 1] = self.order[start:end + 1][::-1]
+        self._index(start, end + 1)
+
+    def rotate(self, start, end, shift):
+        """
+        Rotates the nodes from index start up to end to the left by shift, so
+        the node at start + shift comes first.
+        """
+        segment = self.order[start:end]
+        if not segment:
+            return
+        shift %= len(segment)
+        self.order[start:end] = segment[shift:] + segment[:shift]
+        self._index(start, end)
+
+    def move(self, ix1, ix2):
+        """
+        Moves the node at index ix1 to index ix2, like removing and inserting it
+        in a list.
+        """
+        if ix1 < ix2:
+            self.rotate(ix1, ix2 + 1, 1)
+        else:
+            self.rotate(ix2, ix1 + 1, -1)
+
+    def move_segment(self, start, end, to):
+        """
+        Moves the nodes from index start up to end before the node at index to,
+        with to outside of the segment. This is the or-opt insertion.
+        """
+        if to >= end:
+            self.rotate(start, to, end - start)
+        else:
+            self.rotate(to, end, start - to)